@@ -4,6 +4,12 @@
 
 """
 import argparse
+import array
+import collections
+import mmap
+import multiprocessing
+import os
+from multiprocessing import shared_memory
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -16,7 +22,42 @@ def parse_arguments() -> argparse.Namespace:
         description="Given a text string and a pattern, count the # instances of the pattern"
     )
     parser.add_argument(
-        "data_file", help="2-line file - 1st is txt, 2nd is the pattern"
+        "data_file",
+        help="2-line file - 1st is txt, 2nd is the pattern; "
+        "or an index saved with --save_index (patterns from --pattern_file)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pattern_file",
+        help="count every pattern in this file (1 per line) in a single pass; "
+        "the pattern line of data_file is ignored",
+        required=False,
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        help="scan the text over this many worker processes",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        help="scan the text in chunks straight from the file (bounded memory)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help="chunk size in bytes for --stream",
+        type=int,
+        default=1 << 24,
+        required=False,
+    )
+    parser.add_argument(
+        "--save_index",
+        help="build a suffix automaton index over txt and save it to this file",
+        required=False,
     )
     args = parser.parse_args()
     return args
@@ -34,10 +75,73 @@ def parse_file(filename: str) -> tuple:
     with open(filename) as f:
         lines = f.readlines()
         txt = lines[0].strip()
-        pattern = lines[1].strip()
+        pattern = lines[1].strip() if len(lines) > 1 else ""
     return (txt, pattern)
 
 
+def parse_pattern_file(filename: str) -> list:
+    """Parse pattern file
+
+    Args:
+        filename (str): file - 1 pattern per line (blank lines skipped)
+
+    Returns:
+        list: patterns in file order
+    """
+    with open(filename) as f:
+        patterns = [line.strip() for line in f if line.strip()]
+    return patterns
+
+
+def locate_lines(mm: mmap.mmap, n: int) -> list:
+    """Locate the first n lines of a mapped file without reading them
+
+    Args:
+        mm (mmap.mmap): mapped file
+        n (int): # lines
+
+    Returns:
+        list: (start, end) byte offsets of each line, surrounding whitespace excluded
+    """
+    result = []
+    pos = 0
+    for _ in range(n):
+        eol = mm.find(b"\n", pos)
+        if eol == -1:
+            eol = len(mm)
+        (start, end) = (pos, eol)
+        while start < end and mm[start : start + 1].isspace():
+            start += 1
+        while end > start and mm[end - 1 : end].isspace():
+            end -= 1
+        result.append((start, end))
+        pos = min(eol + 1, len(mm))
+    return result
+
+
+def iter_chunks(mm: mmap.mmap, start: int, end: int, chunk_size: int, overlap: int):
+    """Iterate over mm[start:end] in fixed-size chunks
+
+    Each chunk is prefixed with the last `overlap` bytes of the previous one,
+    so a match of length overlap + 1 spanning a boundary is seen exactly once.
+
+    Args:
+        mm (mmap.mmap): mapped file
+        start (int): 1st byte offset
+        end (int): last byte offset (exclusive)
+        chunk_size (int): # new bytes per chunk
+        overlap (int): # bytes carried over from the previous chunk
+
+    Yields:
+        tuple: (offset of chunk relative to start, chunk bytes)
+    """
+    carry = b""
+    for pos in range(start, end, chunk_size):
+        chunk = b"".join([carry, mm[pos : min(pos + chunk_size, end)]])
+        yield (pos - start - len(carry), chunk)
+        carry = chunk[-overlap:] if overlap else b""
+
+
 def pattern_count(txt: str, pattern: str) -> int:
     """count instances of pattern in txt
 
@@ -66,13 +170,361 @@ def pattern_count(txt: str, pattern: str) -> int:
     return count
 
 
+def count_slice(task: tuple) -> int:
+    """worker: count pattern starts in one slice of a shared-memory text
+
+    Args:
+        task (tuple): (shared memory name, pattern bytes, 1st start,
+            last start (exclusive))
+
+    Returns:
+        int: # matches starting in the slice
+    """
+    (name, pattern, start, end) = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        chunk = bytes(shm.buf[start : end + len(pattern) - 1])
+    finally:
+        shm.close()
+
+    count = 0
+    pos = chunk.find(pattern)
+    while pos != -1:
+        count += 1
+        pos = chunk.find(pattern, pos + 1)
+    return count
+
+
+def pattern_count_parallel(txt: str, pattern: str, processes: int = None) -> int:
+    """count instances of pattern in txt over a process pool
+    txt is copied into shared memory once; each worker counts the matches in a
+    slice of start positions plus a len(pattern)-1 overlap and returns only
+    its count
+
+    Args:
+        txt (str): text to search
+        pattern (str): pattern to match
+        processes (int): # worker processes (default: os.cpu_count())
+
+    Returns:
+        int: # matches
+    """
+    encoded_txt = txt.encode()
+    encoded_pattern = pattern.encode()
+    size = len(encoded_txt)
+    n_starts = size - len(encoded_pattern) + 1
+    if n_starts <= 0:
+        return 0
+    if not encoded_pattern:
+        return n_starts
+
+    processes = processes or os.cpu_count()
+    slice_size = -(-n_starts // processes)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        shm.buf[:size] = encoded_txt
+        del encoded_txt  # the workers read the shared copy
+        tasks = [
+            (shm.name, encoded_pattern, start, min(start + slice_size, n_starts))
+            for start in range(0, n_starts, slice_size)
+        ]
+        with multiprocessing.Pool(processes) as pool:
+            result = sum(pool.map(count_slice, tasks))
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
+
+
+def pattern_count_stream(filename: str, chunk_size: int = 1 << 24) -> int:
+    """count instances of pattern in txt, scanning the file in chunks
+    Same result as pattern_count(*parse_file(filename)) in O(chunk_size) memory
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is pattern
+        chunk_size (int): # bytes of txt per chunk
+
+    Returns:
+        int: # matches
+    """
+    count = 0
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ((txt_start, txt_end), (pattern_start, pattern_end)) = locate_lines(mm, 2)
+            pattern = mm[pattern_start:pattern_end]
+            if not pattern:
+                return max(txt_end - txt_start + 1, 0)
+            for (_, chunk) in iter_chunks(
+                mm, txt_start, txt_end, chunk_size, len(pattern) - 1
+            ):
+                pos = chunk.find(pattern)
+                while pos != -1:
+                    count += 1
+                    pos = chunk.find(pattern, pos + 1)
+    return count
+
+
+def build_automaton(patterns: list) -> tuple:
+    """build an Aho-Corasick automaton over a set of patterns
+
+    Args:
+        patterns (list): patterns to match
+
+    Returns:
+        tuple: (goto, fail, terminal, order)
+            goto - list of dicts (symbol -> node); node 0 is the root
+            fail - list of failure links (node -> node)
+            terminal - dict of pattern -> node spelling that pattern
+            order - nodes in breadth-first order
+    """
+    goto = [{}]
+    terminal = {}
+    for pattern in patterns:
+        node = 0
+        for c in pattern:
+            if c not in goto[node]:
+                goto.append({})
+                goto[node][c] = len(goto) - 1
+            node = goto[node][c]
+        terminal[pattern] = node
+
+    # breadth-first: a node's failure link is the longest proper suffix
+    # of its string which is also a trie node
+    fail = [0] * len(goto)
+    order = [0]
+    queue = collections.deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for c, child in goto[node].items():
+            f = fail[node]
+            while f and c not in goto[f]:
+                f = fail[f]
+            fail[child] = goto[f][c] if node and c in goto[f] else 0
+            queue.append(child)
+
+    return (goto, fail, terminal, order)
+
+
+def pattern_count_multi(txt: str, patterns: list) -> list:
+    """count (overlapping) instances of every pattern in txt in a single pass
+
+    Each text position only bumps the hit count of the deepest automaton node;
+    counts are pushed down the failure links once at the end, so the cost
+    is O(len(txt) + size of automaton) regardless of the # patterns.
+
+    Args:
+        txt (str): text to search
+        patterns (list): patterns to match (duplicates allowed)
+
+    Returns:
+        list: (pattern, # matches) for each pattern, in input order
+    """
+    (goto, fail, terminal, order) = build_automaton(patterns)
+
+    hits = [0] * len(goto)
+    node = 0
+    for c in txt:
+        while node and c not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(c, 0)
+        hits[node] += 1
+
+    # a hit on a node is also a hit on every suffix reachable by failure links
+    for node in reversed(order[1:]):
+        hits[fail[node]] += hits[node]
+
+    # the empty pattern matches at every position, as in pattern_count
+    return [
+        (pattern, hits[terminal[pattern]] if pattern else len(txt) + 1)
+        for pattern in patterns
+    ]
+
+
+INDEX_MAGIC = b"1A-SAM01"
+
+
+def build_suffix_automaton(txt: str) -> tuple:
+    """build a suffix automaton index over txt
+
+    Every substring of txt is spelled by exactly one path from the root;
+    the state reached records how many times that substring occurs.
+
+    Args:
+        txt (str): text to index
+
+    Returns:
+        tuple: (alphabet, transitions, counts)
+            alphabet - str of the distinct symbols in txt
+            transitions - flat array: state * len(alphabet) + symbol -> state (-1 if none)
+            counts - array: state -> # occurrences of the substrings it spells
+    """
+    # online construction - state 0 is the root
+    next_state = [{}]
+    link = [-1]
+    length = [0]
+    is_clone = [False]
+    last = 0
+    for c in txt:
+        cur = len(next_state)
+        next_state.append({})
+        link.append(0)
+        length.append(length[last] + 1)
+        is_clone.append(False)
+        p = last
+        while p != -1 and c not in next_state[p]:
+            next_state[p][c] = cur
+            p = link[p]
+        if p != -1:
+            q = next_state[p][c]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                clone = len(next_state)
+                next_state.append(dict(next_state[q]))
+                link.append(link[q])
+                length.append(length[p] + 1)
+                is_clone.append(True)
+                while p != -1 and next_state[p].get(c) == q:
+                    next_state[p][c] = clone
+                    p = link[p]
+                link[q] = clone
+                link[cur] = clone
+        last = cur
+
+    # each prefix end contributes one occurrence to every state on its suffix-link path
+    n_states = len(next_state)
+    counts = array.array("q", (0 if clone else 1 for clone in is_clone))
+    by_length = [[] for _ in range(len(txt) + 1)]
+    for state in range(1, n_states):
+        by_length[length[state]].append(state)
+    for states in reversed(by_length):
+        for state in states:
+            counts[link[state]] += counts[state]
+    counts[0] = len(txt) + 1  # the empty pattern matches at every offset
+
+    alphabet = "".join(sorted(set(txt)))
+    symbol_index = {c: i for i, c in enumerate(alphabet)}
+    transitions = array.array("i", [-1]) * (n_states * len(alphabet))
+    for state, edges in enumerate(next_state):
+        for c, target in edges.items():
+            transitions[state * len(alphabet) + symbol_index[c]] = target
+
+    return (alphabet, transitions, counts)
+
+
+def save_index(index: tuple, filename: str):
+    """save a suffix automaton index (native byte order)
+
+    Args:
+        index (tuple): (alphabet, transitions, counts) from build_suffix_automaton
+        filename (str): output file
+    """
+    (alphabet, transitions, counts) = index
+    encoded_alphabet = alphabet.encode()
+    with open(filename, "wb") as f:
+        f.write(INDEX_MAGIC)
+        array.array("q", [len(encoded_alphabet), len(counts)]).tofile(f)
+        f.write(encoded_alphabet)
+        transitions.tofile(f)
+        counts.tofile(f)
+
+
+def is_index_file(filename: str) -> bool:
+    """check whether a file is an index written by save_index
+
+    Args:
+        filename (str): file
+
+    Returns:
+        bool: True if the file starts with the index header
+    """
+    with open(filename, "rb") as f:
+        return f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+
+
+def load_index(filename: str) -> tuple:
+    """load a suffix automaton index written by save_index
+
+    Args:
+        filename (str): index file
+
+    Returns:
+        tuple: (alphabet, transitions, counts)
+    """
+    with open(filename, "rb") as f:
+        f.read(len(INDEX_MAGIC))
+        header = array.array("q")
+        header.fromfile(f, 2)
+        (alphabet_size, n_states) = header
+        alphabet = f.read(alphabet_size).decode()
+        transitions = array.array("i")
+        transitions.fromfile(f, n_states * len(alphabet))
+        counts = array.array("q")
+        counts.fromfile(f, n_states)
+    return (alphabet, transitions, counts)
+
+
+def pattern_count_index(index: tuple, pattern: str) -> int:
+    """count instances of pattern using a suffix automaton index
+    O(len(pattern)) regardless of the length of the indexed text
+
+    Args:
+        index (tuple): (alphabet, transitions, counts) from build_suffix_automaton
+        pattern (str): pattern to match
+
+    Returns:
+        int: # matches
+    """
+    (alphabet, transitions, counts) = index
+    state = 0
+    for c in pattern:
+        symbol = alphabet.find(c)
+        if symbol == -1:
+            return 0
+        state = transitions[state * len(alphabet) + symbol]
+        if state == -1:
+            return 0
+    return counts[state]
+
+
 def main():
     """main"""
     args = parse_arguments()
+
+    if args.stream:
+        result = pattern_count_stream(args.data_file, args.chunk_size)
+        print(f"count: {result}")
+        return
+
+    if is_index_file(args.data_file):
+        if not args.pattern_file:
+            raise SystemExit("querying a saved index needs --pattern_file")
+        index = load_index(args.data_file)
+        for pattern in parse_pattern_file(args.pattern_file):
+            print(f"{pattern} {pattern_count_index(index, pattern)}")
+        return
+
     (txt, pattern) = parse_file(args.data_file)
+
+    if args.save_index:
+        save_index(build_suffix_automaton(txt), args.save_index)
+        print(f"index saved: {args.save_index}")
+        return
+
+    if args.pattern_file:
+        patterns = parse_pattern_file(args.pattern_file)
+        result = pattern_count_multi(txt, patterns)
+        for pattern, count in result:
+            print(f"{pattern} {count}")
+        return
+
     print(args.data_file, txt, pattern)
 
-    result = pattern_count(txt, pattern)
+    if args.processes:
+        result = pattern_count_parallel(txt, pattern, args.processes)
+    else:
+        result = pattern_count(txt, pattern)
     print(f"count: {result}")
 
 
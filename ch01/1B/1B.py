@@ -4,7 +4,11 @@
 
 """
 import argparse
+import array
 import collections
+import mmap
+import os
+import tempfile
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -17,6 +21,56 @@ def parse_arguments() -> argparse.Namespace:
         description="Given a text string and k, report the most frequent k-mers"
     )
     parser.add_argument("data_file", help="2-line file - 1st is txt, 2nd is k")
+    parser.add_argument(
+        "-r",
+        "--k_range",
+        help="report the most frequent k-mers for every k in [K_MIN, K_MAX] "
+        "from one suffix array build (k on line 2 of data_file is ignored)",
+        nargs=2,
+        type=int,
+        metavar=("K_MIN", "K_MAX"),
+        required=False,
+    )
+    parser.add_argument(
+        "-H",
+        "--heavy_hitters",
+        help="stream the text through a Space-Saving summary with this many counters "
+        "(bounded memory) instead of counting every k-mer",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "-n",
+        "--top",
+        help="# k-mers to report with --heavy_hitters",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "-e",
+        "--exact",
+        help="with --heavy_hitters, re-read the text to count the candidates exactly",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-b",
+        "--bins",
+        help="count out of core: partition k-mer codes into this many temporary "
+        "bin files and count one bin at a time (k <= 32)",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "--tmp_dir", help="directory for the --bins files", required=False
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help="chunk size in bytes when streaming the text",
+        type=int,
+        default=1 << 24,
+        required=False,
+    )
     args = parser.parse_args()
     return args
 
@@ -37,6 +91,259 @@ def parse_file(filename: str) -> tuple:
     return (txt, k)
 
 
+def suffix_array(txt: str, seed_width: int = 16) -> list:
+    """compute the suffix array by prefix doubling - O(n log^2 n)
+
+    Args:
+        txt (str): text
+        seed_width (int): # symbols compared directly before doubling starts
+
+    Returns:
+        list: start positions of the suffixes of txt in sorted order
+    """
+    n = len(txt)
+    width = seed_width
+    sa = sorted(range(n), key=lambda i: txt[i : i + width])
+    rank = [0] * n
+    for j in range(1, n):
+        prev, pos = sa[j - 1], sa[j]
+        rank[pos] = rank[prev] + (txt[pos : pos + width] != txt[prev : prev + width])
+
+    while n and rank[sa[-1]] < n - 1:
+        # order by the first 2*width symbols, using the ranks of the first width
+        keys = [
+            rank[i] * (n + 1) + (rank[i + width] + 1 if i + width < n else 0)
+            for i in range(n)
+        ]
+        sa.sort(key=keys.__getitem__)
+        for j in range(1, n):
+            rank[sa[j]] = rank[sa[j - 1]] + (keys[sa[j]] != keys[sa[j - 1]])
+        width *= 2
+    return sa
+
+
+def lcp_array(txt: str, sa: list) -> list:
+    """compute the LCP array (Kasai) - O(n)
+
+    Args:
+        txt (str): text
+        sa (list): suffix array of txt
+
+    Returns:
+        list: lcp[i] = longest common prefix of suffixes sa[i-1] and sa[i] (lcp[0] = 0)
+    """
+    n = len(txt)
+    rank = [0] * n
+    for (i, pos) in enumerate(sa):
+        rank[pos] = i
+    lcp = [0] * n
+    h = 0
+    for pos in range(n):
+        if rank[pos] > 0:
+            prev = sa[rank[pos] - 1]
+            while pos + h < n and prev + h < n and txt[pos + h] == txt[prev + h]:
+                h += 1
+            lcp[rank[pos]] = h
+            if h > 0:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+def frequency_words_range(txt: str, k_min: int, k_max: int) -> dict:
+    """find the most frequent k-mers for every k in [k_min, k_max] from one
+    suffix array + LCP build
+
+    Each lcp-interval of the suffix array groups the suffixes sharing a prefix;
+    it spells every substring of length parent lcp + 1 .. its lcp, each occurring
+    (interval size) times, so all k are scored in one bottom-up traversal.
+
+    Args:
+        txt (str): text to search
+        k_min (int): smallest k-mer length
+        k_max (int): largest k-mer length
+
+    Returns:
+        dict: k -> (max count, set of most frequent k-mers), for each k <= len(txt)
+    """
+    n = len(txt)
+    k_max = min(k_max, n)
+    sa = suffix_array(txt)
+    lcp = lcp_array(txt, sa)
+
+    best = {k: (0, []) for k in range(k_min, k_max + 1)}
+    stack = [(0, 0)]  # (lcp, left bound) of the open intervals
+    for i in range(1, n + 1):
+        current = lcp[i] if i < n else 0
+        left = i - 1
+        while current < stack[-1][0]:
+            (interval_lcp, left) = stack.pop()
+            count = i - left
+            parent_lcp = max(current, stack[-1][0])
+            for k in range(max(parent_lcp + 1, k_min), min(interval_lcp, k_max) + 1):
+                if count > best[k][0]:
+                    best[k] = (count, [sa[left]])
+                elif count == best[k][0]:
+                    best[k][1].append(sa[left])
+        if current > stack[-1][0]:
+            stack.append((current, left))
+
+    result = {}
+    for (k, (count, starts)) in best.items():
+        if count == 0:  # no repeats: every k-mer occurs once
+            result[k] = (1, {txt[i : i + k] for i in range(0, n - k + 1)})
+        else:
+            result[k] = (count, {txt[i : i + k] for i in starts})
+    return result
+
+
+def symbol_to_number(c: str) -> int:
+    """convert symbol (A,C,G,T) to int
+
+    Args:
+        c (str): single character - must be in [ACGT]
+
+    Returns:
+        int: index corresponding to pattern
+    """
+    SYMBOL_MAP = {
+        "A": 0,
+        "C": 1,
+        "G": 2,
+        "T": 3,
+    }
+    return SYMBOL_MAP[c.upper()]
+
+
+def number_to_symbol(i: int) -> str:
+    """convert int [0-3] to [ACGT]
+
+    Args:
+        i (int): [0-3]
+
+    Returns:
+        str: single char in [ACGT]
+    """
+    SYMBOLS = ["A", "C", "G", "T"]
+    return SYMBOLS[i]
+
+
+def number_to_pattern(index: int, k: int) -> str:
+    """Convert integer index to pattern
+
+    Args:
+        index: index corresponding to pattern
+        k: k-mer length
+
+    Returns:
+        str: pattern
+    """
+    if k == 1:
+        return number_to_symbol(index)
+
+    prefix_index = index // 4
+    remainder = index % 4
+    symbol = number_to_symbol(remainder)
+    prefix_pattern = number_to_pattern(prefix_index, k - 1)
+    return "".join([prefix_pattern, symbol])
+
+
+# byte -> 2-bit symbol code, for whole chunks at a time
+SYMBOL_TABLE = bytes.maketrans(
+    b"ACGTacgt", bytes(symbol_to_number(c) for c in "ACGTACGT")
+)
+
+# as SYMBOL_TABLE, but every other byte (N, IUPAC codes, ...) -> 4 (a break)
+BREAK_SYMBOL_TABLE = bytes(
+    SYMBOL_TABLE[b] if chr(b) in "ACGTacgt" else 4 for b in range(256)
+)
+
+
+def locate_lines(mm: mmap.mmap, n: int) -> list:
+    """Locate the first n lines of a mapped file without reading them
+
+    Args:
+        mm (mmap.mmap): mapped file
+        n (int): # lines
+
+    Returns:
+        list: (start, end) byte offsets of each line, surrounding whitespace excluded
+    """
+    result = []
+    pos = 0
+    for _ in range(n):
+        eol = mm.find(b"\n", pos)
+        if eol == -1:
+            eol = len(mm)
+        (start, end) = (pos, eol)
+        while start < end and mm[start : start + 1].isspace():
+            start += 1
+        while end > start and mm[end - 1 : end].isspace():
+            end -= 1
+        result.append((start, end))
+        pos = min(eol + 1, len(mm))
+    return result
+
+
+def parse_k(filename: str) -> int:
+    """Read k (2nd line) of a data file without reading the text
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is k
+
+    Returns:
+        int: k
+    """
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            (_, (k_start, k_end)) = locate_lines(mm, 2)
+            return int(mm[k_start:k_end])
+
+
+def iter_chunks(mm: mmap.mmap, start: int, end: int, chunk_size: int, overlap: int):
+    """Iterate over mm[start:end] in fixed-size chunks
+
+    Each chunk is prefixed with the last `overlap` bytes of the previous one,
+    so a match of length overlap + 1 spanning a boundary is seen exactly once.
+
+    Args:
+        mm (mmap.mmap): mapped file
+        start (int): 1st byte offset
+        end (int): last byte offset (exclusive)
+        chunk_size (int): # new bytes per chunk
+        overlap (int): # bytes carried over from the previous chunk
+
+    Yields:
+        tuple: (offset of chunk relative to start, chunk bytes)
+    """
+    carry = b""
+    for pos in range(start, end, chunk_size):
+        chunk = b"".join([carry, mm[pos : min(pos + chunk_size, end)]])
+        yield (pos - start - len(carry), chunk)
+        carry = chunk[-overlap:] if overlap else b""
+
+
+def iter_kmers_stream(filename: str, chunk_size: int = 1 << 24):
+    """Iterate over the k-mers of txt, reading the file in chunks
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is k
+        chunk_size (int): # bytes of txt per chunk
+
+    Yields:
+        str: k-mers in text order
+    """
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ((txt_start, txt_end), (k_start, k_end)) = locate_lines(mm, 2)
+            k = int(mm[k_start:k_end])
+            for (_, chunk) in iter_chunks(mm, txt_start, txt_end, chunk_size, k - 1):
+                txt = chunk.decode()
+                for i in range(0, len(txt) - k + 1):
+                    yield txt[i : i + k]
+
+
 def frequency_words(txt: str, k: int) -> tuple:
     """find most frequent instances of strings of length k (k-mers)
 
@@ -58,10 +365,229 @@ def frequency_words(txt: str, k: int) -> tuple:
     return result
 
 
+def space_saving(kmers, capacity: int) -> tuple:
+    """Space-Saving heavy-hitter summary of a stream of k-mers
+
+    At most `capacity` k-mers are monitored. An unmonitored k-mer replaces one
+    with the smallest count and inherits that count as its error, so for every
+    monitored k-mer: count - error <= true count <= count, and error <= total / capacity.
+    Any k-mer occurring more than min_count times is guaranteed to be monitored.
+
+    Args:
+        kmers (iterable): stream of k-mers
+        capacity (int): # counters (memory budget)
+
+    Returns:
+        tuple: (counts, errors, total, min_count)
+            counts - dict: k-mer -> estimated count (an upper bound)
+            errors - dict: k-mer -> maximum overestimate
+            total - # k-mers in the stream
+            min_count - smallest counter (0 if fewer than capacity k-mers seen)
+    """
+    counts = {}
+    errors = {}
+    buckets = collections.defaultdict(set)  # count -> k-mers with that count
+    min_count = 0
+    total = 0
+    for kmer in kmers:
+        total += 1
+        if kmer in counts:
+            count = counts[kmer]
+            buckets[count].discard(kmer)
+            if not buckets[count]:
+                del buckets[count]
+                if count == min_count:
+                    min_count = count + 1
+        elif len(counts) < capacity:
+            (count, errors[kmer]) = (0, 0)
+            min_count = 1
+        else:
+            count = min_count
+            victim = buckets[count].pop()
+            del counts[victim]
+            del errors[victim]
+            errors[kmer] = count
+            if not buckets[count]:
+                del buckets[count]
+                min_count = count + 1
+        counts[kmer] = count + 1
+        buckets[count + 1].add(kmer)
+
+    if len(counts) < capacity:
+        min_count = 0
+    return (counts, errors, total, min_count)
+
+
+def exact_counts(kmers, candidates: set) -> dict:
+    """count only the candidate k-mers in a stream of k-mers
+
+    Args:
+        kmers (iterable): stream of k-mers
+        candidates (set): k-mers to count
+
+    Returns:
+        dict: candidate k-mer -> exact count
+    """
+    result = dict.fromkeys(candidates, 0)
+    for kmer in kmers:
+        if kmer in result:
+            result[kmer] += 1
+    return result
+
+
+def frequency_words_stream(
+    filename: str, capacity: int, exact: bool = False, chunk_size: int = 1 << 24
+) -> tuple:
+    """find the most frequent k-mers of a file in bounded memory
+
+    Without `exact` the Space-Saving estimates are returned.
+    With `exact` the text is read a second time to count the monitored k-mers exactly;
+    the result is then the same as frequency_words whenever `guaranteed` is True.
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is k
+        capacity (int): # counters (memory budget)
+        exact (bool): confirm the candidates with a second pass
+        chunk_size (int): # bytes of txt per chunk
+
+    Returns:
+        tuple: (ranked, error_bound, guaranteed)
+            ranked - list of (k-mer, count, error), highest count first (error 0 if exact)
+            error_bound - maximum overestimate of any count; with `exact`, the
+                maximum count of any unmonitored k-mer (min_count)
+            guaranteed - True if no unmonitored k-mer can reach the top count
+    """
+    (counts, errors, total, min_count) = space_saving(
+        iter_kmers_stream(filename, chunk_size), capacity
+    )
+    error_bound = max(errors.values(), default=0)
+    if exact:
+        counts = exact_counts(iter_kmers_stream(filename, chunk_size), set(counts))
+        errors = dict.fromkeys(counts, 0)
+        # the monitored counts are now exact; what is unknown is how often
+        # each unmonitored k-mer occurs - at most min_count times
+        error_bound = min_count
+
+    ranked = sorted(
+        ((kmer, count, errors[kmer]) for kmer, count in counts.items()),
+        key=lambda e: (-e[1], e[0]),
+    )
+    # unmonitored k-mers occur at most min_count times
+    guaranteed = bool(ranked) and ranked[0][1] - ranked[0][2] > min_count
+    return (ranked, error_bound, guaranteed)
+
+
+def frequency_words_partitioned(
+    filename: str,
+    n_bins: int,
+    tmp_dir: str = None,
+    chunk_size: int = 1 << 24,
+    buffer_size: int = 1 << 22,
+) -> set:
+    """find most frequent k-mers out of core
+    k <= 32; k-mers containing any byte other than ACGT (e.g. N runs) are skipped
+
+    Pass 1 streams the text, rolls each k-mer into its frequency array index
+    (pattern_to_number) and appends it to bin file (index % n_bins).
+    Pass 2 counts one bin at a time, so peak memory is set by the bin size,
+    not by the # distinct k-mers. The bin files are removed even on failure.
+    A bin file is only opened (to append) when its buffer is flushed, so the
+    # open files does not grow with n_bins.
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is k
+        n_bins (int): # bin files
+        tmp_dir (str): directory for the bin files (default: system temp dir)
+        chunk_size (int): # bytes of txt read at a time
+        buffer_size (int): # codes buffered over all bins before writing
+
+    Returns:
+        set: most frequent k-mers (upper case)
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as bin_dir:
+        bin_files = [os.path.join(bin_dir, f"bin{i:05d}") for i in range(n_bins)]
+
+        def flush(i: int):
+            """append bin i's buffered codes to its file"""
+            with open(bin_files[i], "ab") as output:
+                buffers[i].tofile(output)
+            del buffers[i][:]
+
+        # pass 1: partition
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ((txt_start, txt_end), (k_start, k_end)) = locate_lines(mm, 2)
+                k = int(mm[k_start:k_end])
+                mask = 4**k - 1
+                bin_buffer_size = max(1, buffer_size // n_bins)
+                buffers = [array.array("Q") for _ in range(n_bins)]
+                (code, filled) = (0, 0)  # filled = # ACGT bases since a break
+                chunks = iter_chunks(mm, txt_start, txt_end, chunk_size, 0)
+                for (_, chunk) in chunks:
+                    for symbol in chunk.translate(BREAK_SYMBOL_TABLE):
+                        if symbol > 3:
+                            (code, filled) = (0, 0)
+                            continue
+                        code = ((code << 2) | symbol) & mask
+                        filled += 1
+                        if filled >= k:
+                            buffer = buffers[code % n_bins]
+                            buffer.append(code)
+                            if len(buffer) >= bin_buffer_size:
+                                flush(code % n_bins)
+                for i in range(n_bins):
+                    flush(i)
+
+        # pass 2: count each bin independently; a k-mer lives in exactly one bin
+        max_count = 0
+        result = set()
+        for name in bin_files:
+            codes = array.array("Q")
+            with open(name, "rb") as f:
+                codes.frombytes(f.read())
+            os.remove(name)
+            for (code, count) in collections.Counter(codes).items():
+                if count > max_count:
+                    (max_count, result) = (count, {code})
+                elif count == max_count:
+                    result.add(code)
+
+    return {number_to_pattern(code, k) for code in result}
+
+
 def main():
     """main"""
     args = parse_arguments()
+
+    if args.heavy_hitters:
+        (ranked, error_bound, guaranteed) = frequency_words_stream(
+            args.data_file, args.heavy_hitters, args.exact, args.chunk_size
+        )
+        for (kmer, count, error) in ranked[: args.top]:
+            print(f"{kmer} {count} {error}")
+        print(f"error bound: {error_bound} guaranteed top: {guaranteed}")
+        if args.exact and ranked:
+            result = {kmer for (kmer, count, _) in ranked if count == ranked[0][1]}
+            # unmonitored k-mers may tie or beat these unless guaranteed
+            print(f"{'result' if guaranteed else 'candidates'}: {result}")
+        return
+
+    if args.bins:
+        if not 1 <= parse_k(args.data_file) <= 32:
+            raise SystemExit("--bins needs 1 <= k <= 32 (uint64 k-mer codes)")
+        result = frequency_words_partitioned(
+            args.data_file, args.bins, args.tmp_dir, args.chunk_size
+        )
+        print(f"result: {result}")
+        return
+
     (txt, k) = parse_file(args.data_file)
+
+    if args.k_range:
+        result = frequency_words_range(txt, *args.k_range)
+        for (k, (count, kmers)) in result.items():
+            print(f"{k} {count} {' '.join(sorted(kmers))}")
+        return
     print(args.data_file, txt, k)
 
     result = frequency_words(txt, k)
@@ -0,0 +1,146 @@
+# /usr/bin/env python3
+"""Bioinformatics Algorithms Ch 01 Problem 1B
+   Find the most frequent k-mers in a string
+   (k-mers are counted as 2-bit integer codes with NumPy - requires numpy)
+
+"""
+import argparse
+
+import numpy as np
+
+# 2-bit code for each byte: A=0, C=1, G=2, T=3 (either case)
+SYMBOL_CODES = np.zeros(256, dtype=np.uint8)
+for (symbols, code) in (("Aa", 0), ("Cc", 1), ("Gg", 2), ("Tt", 3)):
+    for symbol in symbols:
+        SYMBOL_CODES[ord(symbol)] = code
+
+# largest k counted with a dense 4^k array (np.bincount) rather than np.unique
+MAX_DENSE_K = 12
+
+
+def parse_arguments() -> argparse.Namespace:
+    """parse arguments
+
+    Returns:
+        argparse.Namespace: argument object
+    """
+    parser = argparse.ArgumentParser(
+        description="Given a text string and k, report the most frequent k-mers"
+    )
+    parser.add_argument("data_file", help="2-line file - 1st is txt, 2nd is k")
+    args = parser.parse_args()
+    return args
+
+
+def parse_file(filename: str) -> tuple:
+    """Parse file
+
+    Args:
+        filename (str): file - 1st line is txt, 2nd is k
+
+    Returns:
+        tuple: (txt, k)
+    """
+    with open(filename) as f:
+        lines = f.readlines()
+        txt = lines[0].strip()
+        k = int(lines[1].strip())
+    return (txt, k)
+
+
+def encode_sequence(txt: str) -> np.ndarray:
+    """convert a DNA sequence to 2-bit symbol codes
+        Assumes only ACGT in the string
+
+    Args:
+        txt (str): DNA sequence
+
+    Returns:
+        np.ndarray: uint8 array of codes (A=0, C=1, G=2, T=3)
+    """
+    return SYMBOL_CODES[np.frombuffer(txt.encode(), dtype=np.uint8)]
+
+
+def kmer_codes(codes: np.ndarray, k: int) -> np.ndarray:
+    """compute the integer code of every k-mer (same numbering as pattern_to_number)
+
+    Args:
+        codes (np.ndarray): 2-bit symbol codes
+        k (int): k-mer length (<= 32)
+
+    Returns:
+        np.ndarray: uint64 array - code of the k-mer starting at each position
+    """
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64)
+
+    # build up the code length bit by bit from the top of k:
+    # doubling joins two length-L codes L apart; a set bit appends one base
+    result = codes.astype(np.uint64)
+    length = 1
+    for bit in bin(k)[3:]:
+        result = (result[:-length] << np.uint64(2 * length)) | result[length:]
+        length *= 2
+        if bit == "1":
+            result = (result[:-1] << np.uint64(2)) | codes[length:]
+            length += 1
+    return result
+
+
+def number_to_pattern(index: int, k: int) -> str:
+    """Convert a k-mer code back to its pattern
+
+    Args:
+        index (int): k-mer code
+        k (int): k-mer length
+
+    Returns:
+        str: pattern
+    """
+    symbols = []
+    for _ in range(k):
+        symbols.append("ACGT"[index & 3])
+        index >>= 2
+    return "".join(reversed(symbols))
+
+
+def frequency_words_faster(txt: str, k: int) -> set:
+    """find most frequent instances of strings of length k (k-mers)
+        Assumes only ACGT in the string; k-mers are reported upper case
+
+    Args:
+        text (str): text to search
+        k (int): k-mer length (<= 32)
+
+    Returns:
+        set: most frequent k-mers (empty if txt is shorter than k)
+    """
+    codes = kmer_codes(encode_sequence(txt), k)
+    if len(codes) == 0:
+        return set()
+
+    if k <= MAX_DENSE_K:
+        counts = np.bincount(codes.astype(np.intp), minlength=4**k)
+        max_count = counts.max()
+        most_frequent = np.flatnonzero(counts == max_count)
+    else:
+        (values, counts) = np.unique(codes, return_counts=True)
+        max_count = counts.max()
+        most_frequent = values[counts == max_count]
+
+    result = {number_to_pattern(int(code), k) for code in most_frequent}
+    return result
+
+
+def main():
+    """main"""
+    args = parse_arguments()
+    (txt, k) = parse_file(args.data_file)
+    print(args.data_file, txt, k)
+
+    result = frequency_words_faster(txt, k)
+    print(f"result: {result}")
+
+
+if __name__ == "__main__":
+    main()
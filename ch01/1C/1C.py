@@ -4,7 +4,7 @@
 
 """
 import argparse
-import collections
+import os
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -17,6 +17,21 @@ def parse_arguments() -> argparse.Namespace:
         description="Given a DNA sequence, generate the reverse complement"
     )
     parser.add_argument("data_file", help="1 line DNA sequence")
+    parser.add_argument(
+        "-o",
+        "--output_file",
+        help="stream the reverse complement to this file in constant memory; "
+        "data_file may be a single-record FASTA file (line-wrapped sequence)",
+        required=False,
+    )
+    parser.add_argument(
+        "-b",
+        "--block_size",
+        help="block size in bytes for --output_file",
+        type=int,
+        default=1 << 20,
+        required=False,
+    )
     args = parser.parse_args()
     return args
 
@@ -36,6 +51,11 @@ def parse_file(filename: str) -> str:
     return dna_sequence
 
 
+COMPLEMENT_TABLE = str.maketrans("ACGT", "TGCA")
+COMPLEMENT_BYTES = bytes.maketrans(b"ACGTacgt", b"TGCATGCA")
+WHITESPACE = b" \t\r\n"
+
+
 def reverse_complement_dna(dna_sequence: str) -> str:
     """compute the reverse complement of a DNA sequence
         Assumes only ATCG in the string
@@ -47,17 +67,46 @@ def reverse_complement_dna(dna_sequence: str) -> str:
         str: reverse complement of dna_sequence (upper case)
     """
 
-    complement_map = {"A": "T", "C": "G", "G": "C", "T": "A"}
+    return dna_sequence.upper().translate(COMPLEMENT_TABLE)[::-1]
+
 
-    result = ""
-    for base in reversed(dna_sequence.upper()):
-        result = "".join([result, complement_map[base]])
-    return result
+def reverse_complement_file(in_file: str, out_file: str, block_size: int = 1 << 20):
+    """write the reverse complement of a DNA sequence file to another file
+        Assumes only ATCG in the sequence. The file is read backwards in
+        blocks, so memory use does not depend on the sequence length.
+        A leading FASTA header line is copied; line breaks are dropped.
+
+    Args:
+        in_file (str): DNA sequence file (1 line, or 1 FASTA record)
+        out_file (str): output file - (header), reverse complement (upper case)
+        block_size (int): # bytes read at a time
+    """
+    with open(in_file, "rb") as fin, open(out_file, "wb") as fout:
+        start = 0
+        if fin.read(1) == b">":
+            fin.seek(0)
+            header = fin.readline()
+            fout.write(header.rstrip(WHITESPACE) + b"\n")
+            start = fin.tell()
+
+        pos = fin.seek(0, os.SEEK_END)
+        while pos > start:
+            size = min(block_size, pos - start)
+            pos -= size
+            fin.seek(pos)
+            block = fin.read(size).translate(COMPLEMENT_BYTES, WHITESPACE)
+            fout.write(block[::-1])
+        fout.write(b"\n")
 
 
 def main():
     """main"""
     args = parse_arguments()
+
+    if args.output_file:
+        reverse_complement_file(args.data_file, args.output_file, args.block_size)
+        return
+
     dna_sequence = parse_file(args.data_file)
 
     result = reverse_complement_dna(dna_sequence)
@@ -4,6 +4,15 @@
 
 """
 import argparse
+import array
+import bisect
+import collections
+import itertools
+import mmap
+import multiprocessing
+import os
+import sys
+from multiprocessing import shared_memory
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -16,7 +25,80 @@ def parse_arguments() -> argparse.Namespace:
         description="Given a text string and a pattern, find all start positions for the pattern"
     )
     parser.add_argument(
-        "data_file", help="2-line file - 1st is pattern, 2nd is the text"
+        "data_file",
+        help="2-line file - 1st is pattern, 2nd is the text; "
+        "or an index saved with --save_index (patterns from --pattern_file)",
+    )
+    parser.add_argument(
+        "--save_index",
+        help="build a suffix array index over the text and save it to this file",
+        required=False,
+    )
+    parser.add_argument(
+        "--fm_index",
+        help="with --save_index, save a compressed FM-index instead",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--occ_rate",
+        help="FM-index: rows between occurrence checkpoints (memory vs count speed)",
+        type=int,
+        default=64,
+        required=False,
+    )
+    parser.add_argument(
+        "--sa_rate",
+        help="FM-index: keep every sa_rate-th text position (memory vs locate speed)",
+        type=int,
+        default=32,
+        required=False,
+    )
+    parser.add_argument(
+        "-p",
+        "--pattern_file",
+        help="patterns (1 per line) to look up in a saved index or --minimizer index",
+        required=False,
+    )
+    parser.add_argument(
+        "-m",
+        "--minimizer",
+        help="look up the --pattern_file patterns with a sparse (k, w) minimizer "
+        "index over the text, k <= 31 (exact for patterns of length >= w + k - 1)",
+        nargs=2,
+        type=int,
+        metavar=("K", "W"),
+        required=False,
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        help="scan the text over this many worker processes",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        help="scan the text in chunks straight from the file (bounded memory)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help="chunk size in bytes for --stream",
+        type=int,
+        default=1 << 24,
+        required=False,
+    )
+    parser.add_argument(
+        "-o", "--output_file", help="write the positions to this file", required=False
+    )
+    parser.add_argument(
+        "-f",
+        "--output_format",
+        help="text - space separated; varint - LEB128 deltas; npy - NumPy int64 array",
+        choices=["text", "varint", "npy"],
+        default="text",
     )
     args = parser.parse_args()
     return args
@@ -38,7 +120,70 @@ def parse_file(filename: str) -> tuple:
     return (txt, pattern)
 
 
-def pattern_match(txt: str, pattern: str) -> list:
+def parse_pattern_file(filename: str) -> list:
+    """Parse pattern file
+
+    Args:
+        filename (str): file - 1 pattern per line (blank lines skipped)
+
+    Returns:
+        list: patterns in file order
+    """
+    with open(filename) as f:
+        patterns = [line.strip() for line in f if line.strip()]
+    return patterns
+
+
+def locate_lines(mm: mmap.mmap, n: int) -> list:
+    """Locate the first n lines of a mapped file without reading them
+
+    Args:
+        mm (mmap.mmap): mapped file
+        n (int): # lines
+
+    Returns:
+        list: (start, end) byte offsets of each line, surrounding whitespace excluded
+    """
+    result = []
+    pos = 0
+    for _ in range(n):
+        eol = mm.find(b"\n", pos)
+        if eol == -1:
+            eol = len(mm)
+        (start, end) = (pos, eol)
+        while start < end and mm[start : start + 1].isspace():
+            start += 1
+        while end > start and mm[end - 1 : end].isspace():
+            end -= 1
+        result.append((start, end))
+        pos = min(eol + 1, len(mm))
+    return result
+
+
+def iter_chunks(mm: mmap.mmap, start: int, end: int, chunk_size: int, overlap: int):
+    """Iterate over mm[start:end] in fixed-size chunks
+
+    Each chunk is prefixed with the last `overlap` bytes of the previous one,
+    so a match of length overlap + 1 spanning a boundary is seen exactly once.
+
+    Args:
+        mm (mmap.mmap): mapped file
+        start (int): 1st byte offset
+        end (int): last byte offset (exclusive)
+        chunk_size (int): # new bytes per chunk
+        overlap (int): # bytes carried over from the previous chunk
+
+    Yields:
+        tuple: (offset of chunk relative to start, chunk bytes)
+    """
+    carry = b""
+    for pos in range(start, end, chunk_size):
+        chunk = b"".join([carry, mm[pos : min(pos + chunk_size, end)]])
+        yield (pos - start - len(carry), chunk)
+        carry = chunk[-overlap:] if overlap else b""
+
+
+def pattern_match(txt: str, pattern: str) -> array.array:
     """start positions of all instances of pattern in txt
 
     Args:
@@ -46,10 +191,10 @@ def pattern_match(txt: str, pattern: str) -> list:
         pattern (str): pattern to match
 
     Returns:
-        list: list of starting positions (int)
+        array.array: starting positions (int64)
     """
 
-    starts = []
+    starts = array.array("q")
     pos = 0
     while pos != -1:
         pos = txt.find(pattern, pos)
@@ -60,14 +205,666 @@ def pattern_match(txt: str, pattern: str) -> list:
     return starts
 
 
+def scan_slice(task: tuple) -> list:
+    """worker: find pattern starts in one slice of a shared-memory text
+
+    Args:
+        task (tuple): (shared memory name, pattern bytes, 1st start, last start (exclusive))
+
+    Returns:
+        list: start positions in the slice (absolute)
+    """
+    (name, pattern, start, end) = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        chunk = bytes(shm.buf[start : end + len(pattern) - 1])
+    finally:
+        shm.close()
+
+    starts = []
+    pos = chunk.find(pattern)
+    while pos != -1:
+        starts.append(start + pos)
+        pos = chunk.find(pattern, pos + 1)
+    return starts
+
+
+def scan_parallel(txt: str, pattern: str, processes: int = None) -> list:
+    """start positions of all instances of pattern in txt, over a process pool
+    txt is copied into shared memory once; each worker scans a slice of
+    start positions plus a len(pattern)-1 overlap, and the slices are merged in order
+
+    Args:
+        txt (str): text to search
+        pattern (str): pattern to match
+        processes (int): # worker processes (default: os.cpu_count())
+
+    Returns:
+        list: per-slice lists of starting positions, in text order
+    """
+    encoded_txt = txt.encode()
+    encoded_pattern = pattern.encode()
+    n_starts = len(encoded_txt) - len(encoded_pattern) + 1
+    if n_starts <= 0:
+        return []
+    if not encoded_pattern:
+        return [list(range(n_starts))]
+
+    processes = processes or os.cpu_count()
+    slice_size = -(-n_starts // processes)
+    shm = shared_memory.SharedMemory(create=True, size=len(encoded_txt))
+    try:
+        shm.buf[: len(encoded_txt)] = encoded_txt
+        tasks = [
+            (shm.name, encoded_pattern, start, min(start + slice_size, n_starts))
+            for start in range(0, n_starts, slice_size)
+        ]
+        with multiprocessing.Pool(processes) as pool:
+            result = pool.map(scan_slice, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
+
+
+def pattern_match_parallel(
+    txt: str, pattern: str, processes: int = None
+) -> array.array:
+    """start positions of all instances of pattern in txt over a process pool
+
+    Args:
+        txt (str): text to search
+        pattern (str): pattern to match
+        processes (int): # worker processes (default: os.cpu_count())
+
+    Returns:
+        array.array: starting positions (int64)
+    """
+    starts = array.array("q")
+    for slice_starts in scan_parallel(txt, pattern, processes):
+        starts.extend(slice_starts)
+    return starts
+
+
+def pattern_match_stream(filename: str, chunk_size: int = 1 << 24):
+    """start positions of all instances of pattern in txt, scanning the file in chunks
+    Same positions as pattern_match(*parse_file(filename)) in O(chunk_size) memory
+
+    Args:
+        filename (str): file - 1st line is pattern, 2nd is txt
+        chunk_size (int): # bytes of txt per chunk
+
+    Yields:
+        int: starting positions, in increasing order
+    """
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ((pattern_start, pattern_end), (txt_start, txt_end)) = locate_lines(mm, 2)
+            pattern = mm[pattern_start:pattern_end]
+            if not pattern:
+                yield from range(0, txt_end - txt_start + 1)
+                return
+            for (offset, chunk) in iter_chunks(
+                mm, txt_start, txt_end, chunk_size, len(pattern) - 1
+            ):
+                pos = chunk.find(pattern)
+                while pos != -1:
+                    yield offset + pos
+                    pos = chunk.find(pattern, pos + 1)
+
+
+def write_positions_text(positions, f, batch_size: int = 1 << 16):
+    """write positions as space-separated text, one batch of strings at a time
+
+    Args:
+        positions (iterable): positions (int)
+        f (file): text file
+        batch_size (int): # positions formatted per write
+    """
+    positions = iter(positions)
+    separator = ""
+    while True:
+        batch = " ".join(map(str, itertools.islice(positions, batch_size)))
+        if not batch:
+            break
+        f.write(separator)
+        f.write(batch)
+        separator = " "
+
+
+def encode_varint_deltas(positions) -> bytes:
+    """encode increasing positions as LEB128 varints of the gaps between them
+
+    Args:
+        positions (iterable): positions (int) in increasing order
+
+    Returns:
+        bytes: encoded positions
+    """
+    result = bytearray()
+    previous = 0
+    for pos in positions:
+        (delta, previous) = (pos - previous, pos)
+        while delta >= 0x80:
+            result.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        result.append(delta)
+    return bytes(result)
+
+
+def decode_varint_deltas(data: bytes) -> array.array:
+    """decode positions written by encode_varint_deltas
+
+    Args:
+        data (bytes): encoded positions
+
+    Returns:
+        array.array: positions (int64)
+    """
+    result = array.array("q")
+    (pos, delta, shift) = (0, 0, 0)
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            pos += delta
+            result.append(pos)
+            (delta, shift) = (0, 0)
+    return result
+
+
+def encode_npy(positions) -> bytes:
+    """encode positions as a NumPy .npy file (1-D little-endian int64 array)
+
+    Args:
+        positions (iterable): positions (int)
+
+    Returns:
+        bytes: .npy file contents
+    """
+    values = array.array("q", positions)
+    if sys.byteorder == "big":
+        values.byteswap()
+    header = f"{{'descr': '<i8', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    header = header.ljust(63 - (10 + len(header)) % 64 + len(header)) + "\n"
+    return b"".join(
+        [
+            b"\x93NUMPY\x01\x00",
+            len(header).to_bytes(2, "little"),
+            header.encode(),
+            values.tobytes(),
+        ]
+    )
+
+
+def write_positions(
+    positions,
+    filename: str = None,
+    output_format: str = "text",
+    prefix: str = "",
+    append: bool = False,
+):
+    """write positions to a file (default: stdout)
+
+    Args:
+        positions (iterable): positions (int) in increasing order
+        filename (str): output file (None for stdout)
+        output_format (str): text - space separated; varint - LEB128 deltas; npy - .npy
+        prefix (str): text written before the positions (text format only)
+        append (bool): add a line to filename rather than overwrite (text only)
+    """
+    if output_format == "text":
+        f = open(filename, "a" if append else "w") if filename else sys.stdout
+        try:
+            f.write(prefix)
+            write_positions_text(positions, f)
+            f.write("\n")
+        finally:
+            if filename:
+                f.close()
+        return
+
+    encode = encode_npy if output_format == "npy" else encode_varint_deltas
+    if filename:
+        with open(filename, "wb") as f:
+            f.write(encode(positions))
+    else:
+        sys.stdout.flush()  # text already written must precede the binary data
+        sys.stdout.buffer.write(encode(positions))
+
+
+SA_INDEX_MAGIC = b"1D-SA-01"
+FM_INDEX_MAGIC = b"1D-FM-01"
+
+
+def suffix_array(txt: str, seed_width: int = 16) -> list:
+    """compute the suffix array by prefix doubling - O(n log^2 n)
+
+    Args:
+        txt (str): text
+        seed_width (int): # symbols compared directly before doubling starts
+
+    Returns:
+        list: start positions of the suffixes of txt in sorted order
+    """
+    n = len(txt)
+    width = seed_width
+    sa = sorted(range(n), key=lambda i: txt[i : i + width])
+    rank = [0] * n
+    for j in range(1, n):
+        prev, pos = sa[j - 1], sa[j]
+        rank[pos] = rank[prev] + (txt[pos : pos + width] != txt[prev : prev + width])
+
+    while n and rank[sa[-1]] < n - 1:
+        # order by the first 2*width symbols, using the ranks of the first width
+        keys = [
+            rank[i] * (n + 1) + (rank[i + width] + 1 if i + width < n else 0)
+            for i in range(n)
+        ]
+        sa.sort(key=keys.__getitem__)
+        for j in range(1, n):
+            rank[sa[j]] = rank[sa[j - 1]] + (keys[sa[j]] != keys[sa[j - 1]])
+        width *= 2
+    return sa
+
+
+def index_type(filename: str) -> bytes:
+    """read the header of a saved index
+
+    Args:
+        filename (str): file
+
+    Returns:
+        bytes: index magic (SA_INDEX_MAGIC, ...) or b"" if not an index
+    """
+    with open(filename, "rb") as f:
+        magic = f.read(len(SA_INDEX_MAGIC))
+    return magic if magic in (SA_INDEX_MAGIC, FM_INDEX_MAGIC) else b""
+
+
+def save_suffix_array_index(txt: str, filename: str):
+    """build the suffix array of txt and save it with the text
+    Layout (native byte order): magic, int64 n, text padded to 8 bytes, int64 sa[n]
+
+    Args:
+        txt (str): text to index
+        filename (str): output file
+    """
+    encoded_txt = txt.encode()
+    n = len(encoded_txt)
+    with open(filename, "wb") as f:
+        f.write(SA_INDEX_MAGIC)
+        array.array("q", [n]).tofile(f)
+        f.write(encoded_txt)
+        f.write(bytes(-n % 8))
+        array.array("q", suffix_array(encoded_txt)).tofile(f)
+
+
+def load_suffix_array_index(filename: str) -> tuple:
+    """map a saved suffix array index - nothing is read until it is searched
+
+    Args:
+        filename (str): index file
+
+    Returns:
+        tuple: (txt, sa) - memoryviews of the text bytes and the int64 suffix array
+    """
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    header = len(SA_INDEX_MAGIC)
+    n = view[header : header + 8].cast("q")[0]
+    txt_start = header + 8
+    sa_start = txt_start + n + (-n % 8)
+    txt = view[txt_start : txt_start + n]
+    sa = view[sa_start : sa_start + 8 * n].cast("q")
+    return (txt, sa)
+
+
+def pattern_match_index(index: tuple, pattern: str) -> array.array:
+    """start positions of all instances of pattern using a suffix array index
+    Two binary searches over the suffix array - O(len(pattern) log n)
+
+    Args:
+        index (tuple): (txt, sa) from load_suffix_array_index
+        pattern (str): pattern to match
+
+    Returns:
+        array.array: starting positions (int64)
+    """
+    (txt, sa) = index
+    encoded_pattern = pattern.encode()
+    m = len(encoded_pattern)
+
+    # suffixes starting with pattern form one block of sa: [first, last)
+    (lo, hi) = (0, len(sa))
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if bytes(txt[sa[mid] : sa[mid] + m]) < encoded_pattern:
+            lo = mid + 1
+        else:
+            hi = mid
+    first = lo
+    hi = len(sa)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if bytes(txt[sa[mid] : sa[mid] + m]) == encoded_pattern:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    return array.array("q", sorted(sa[first:lo]))
+
+
+def save_fm_index(txt: str, filename: str, occ_rate: int = 64, sa_rate: int = 32):
+    """build an FM-index of txt and save it as one mappable file
+
+    The BWT is stored with the count of each symbol before every occ_rate-th row,
+    and the suffix array is kept only for text positions divisible by sa_rate
+    (flagged in a row bitmap with a rank checkpoint every 64 rows).
+    Layout (native byte order, sections padded to 8 bytes): magic,
+    int64 [n, sigma, occ_rate, # samples], alphabet, int64 C[sigma], bwt,
+    int64 occ[n // occ_rate + 1][sigma], bitmap, int64 ranks[ceil(n / 64) + 1],
+    int64 samples
+
+    Args:
+        txt (str): text to index (must not contain NUL)
+        filename (str): output file
+        occ_rate (int): rows between occurrence checkpoints
+        sa_rate (int): suffix array sampling rate (text positions)
+    """
+    encoded_txt = b"".join([txt.encode(), b"\0"])  # NUL sorts before every symbol
+    n = len(encoded_txt)
+    sa = suffix_array(encoded_txt)
+    bwt = bytes(encoded_txt[pos - 1] for pos in sa)
+    alphabet = bytes(sorted(set(encoded_txt)))
+    sigma = len(alphabet)
+
+    symbol_counts = [bwt.count(c) for c in alphabet]
+    first_row = array.array("q", [0] * sigma)  # C: # symbols smaller than each
+    for i in range(1, sigma):
+        first_row[i] = first_row[i - 1] + symbol_counts[i - 1]
+
+    occ = array.array("q")
+    running = [0] * sigma
+    for start in range(0, n + 1, occ_rate):
+        occ.extend(running)
+        for (i, c) in enumerate(alphabet):
+            running[i] += bwt.count(c, start, start + occ_rate)
+
+    marked = bytearray((n + 7) // 8)
+    samples = array.array("q")
+    for (row, pos) in enumerate(sa):
+        if pos % sa_rate == 0:
+            marked[row // 8] |= 1 << (row % 8)
+            samples.append(pos)
+    marked.extend(bytes(-len(marked) % 8))
+    mark_ranks = array.array("q", [0])
+    for j in range(0, len(marked), 8):
+        word = int.from_bytes(marked[j : j + 8], "little")
+        mark_ranks.append(mark_ranks[-1] + word.bit_count())
+
+    with open(filename, "wb") as f:
+        f.write(FM_INDEX_MAGIC)
+        array.array("q", [n, sigma, occ_rate, len(samples)]).tofile(f)
+        for section in (alphabet, first_row, bwt, occ, marked, mark_ranks, samples):
+            section = bytes(section)
+            f.write(section)
+            f.write(bytes(-len(section) % 8))
+
+
+def load_fm_index(filename: str) -> tuple:
+    """map a saved FM-index - nothing is read until it is searched
+
+    Args:
+        filename (str): index file
+
+    Returns:
+        tuple: (alphabet, C, bwt, occ, occ_rate, marked, mark_ranks, samples)
+    """
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    pos = len(FM_INDEX_MAGIC)
+    (n, sigma, occ_rate, n_samples) = view[pos : pos + 32].cast("q")
+    pos += 32
+
+    sections = []
+    for (size, fmt) in (
+        (sigma, None),
+        (8 * sigma, "q"),
+        (n, None),
+        (8 * (n // occ_rate + 1) * sigma, "q"),
+        ((n + 7) // 8, None),
+        (8 * ((n + 63) // 64 + 1), "q"),
+        (8 * n_samples, "q"),
+    ):
+        section = view[pos : pos + size]
+        sections.append(section.cast(fmt) if fmt else section)
+        pos += size + (-size % 8)
+
+    (alphabet, first_row, bwt, occ, marked, mark_ranks, samples) = sections
+    alphabet = bytes(alphabet)
+    return (alphabet, first_row, bwt, occ, occ_rate, marked, mark_ranks, samples)
+
+
+def pattern_match_fm(index: tuple, pattern: str) -> array.array:
+    """start positions of all instances of pattern using an FM-index
+    Backward search counts the matches in O(len(pattern)) checkpoint lookups;
+    each match is located by LF-mapping back to the nearest sampled position
+
+    Args:
+        index (tuple): from load_fm_index
+        pattern (str): pattern to match
+
+    Returns:
+        array.array: starting positions (int64)
+    """
+    (alphabet, first_row, bwt, occ, occ_rate, marked, mark_ranks, samples) = index
+    sigma = len(alphabet)
+    symbol_index = {c: i for (i, c) in enumerate(alphabet)}
+
+    def occurrences(i: int, row: int) -> int:
+        """# of alphabet[i] in bwt[:row]"""
+        start = row - row % occ_rate
+        partial = bytes(bwt[start:row]).count(alphabet[i])
+        return occ[start // occ_rate * sigma + i] + partial
+
+    (lo, hi) = (0, len(bwt))
+    for c in reversed(pattern.encode()):
+        if c not in symbol_index:
+            return array.array("q")
+        i = symbol_index[c]
+        lo = first_row[i] + occurrences(i, lo)
+        hi = first_row[i] + occurrences(i, hi)
+        if lo >= hi:
+            return array.array("q")
+
+    result = []
+    for row in range(lo, hi):
+        steps = 0
+        while not marked[row // 8] >> (row % 8) & 1:
+            i = symbol_index[bwt[row]]
+            row = first_row[i] + occurrences(i, row)
+            steps += 1
+        word = int.from_bytes(marked[row // 64 * 8 : row // 64 * 8 + 8], "little")
+        rank = mark_ranks[row // 64] + (word & ((1 << (row % 64)) - 1)).bit_count()
+        result.append(samples[rank] + steps)
+
+    return array.array("q", sorted(result))
+
+
+# byte -> 2-bit symbol code (A=0, C=1, G=2, T=3)
+SYMBOL_TABLE = bytes.maketrans(b"ACGTacgt", bytes([0, 1, 2, 3, 0, 1, 2, 3]))
+
+
+def kmer_hashes(txt: str, k: int) -> list:
+    """hash every k-mer of a DNA sequence
+        Assumes only ACGT in the string
+
+    The 2-bit k-mer code is multiplied by an odd constant mod 4^k: a bijection,
+    so distinct k-mers never collide, but low-complexity k-mers such as AAA...A
+    are no longer always the smallest.
+
+    Args:
+        txt (str): DNA sequence
+        k (int): k-mer length
+
+    Returns:
+        list: hash of the k-mer starting at each position
+    """
+    mask = 4**k - 1
+    result = []
+    code = 0
+    for (i, symbol) in enumerate(txt.encode().translate(SYMBOL_TABLE)):
+        code = ((code << 2) | symbol) & mask
+        if i >= k - 1:
+            result.append((code * 0x9E3779B97F4A7C15) & mask)
+    return result
+
+
+def window_minimizers(hashes: list, w: int):
+    """find the minimizer of every window of w consecutive k-mers
+    (leftmost smallest hash) with a monotone queue - O(n)
+
+    Args:
+        hashes (list): k-mer hashes
+        w (int): window size (# k-mers)
+
+    Yields:
+        tuple: (position, hash) of each distinct minimizer, in position order
+    """
+    window = collections.deque()  # positions with increasing hashes
+    last = -1
+    for (i, h) in enumerate(hashes):
+        while window and hashes[window[-1]] > h:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - w:
+            window.popleft()
+        if i >= w - 1 and window[0] != last:
+            last = window[0]
+            yield (last, hashes[last])
+
+
+def build_minimizer_index(txt: str, k: int, w: int) -> tuple:
+    """index the positions of the (k, w) window minimizers of txt
+    Stores about 2 / (w + 1) of the positions a full k-mer table would
+
+    Args:
+        txt (str): text to index (ACGT)
+        k (int): k-mer length
+        w (int): window size (# k-mers)
+
+    Returns:
+        tuple: (k, w, hashes, positions)
+            hashes, positions - parallel int64 arrays sorted by (hash, position)
+    """
+    entries = sorted(
+        window_minimizers(kmer_hashes(txt, k), w), key=lambda e: (e[1], e[0])
+    )
+    hashes = array.array("q", (h for (_, h) in entries))
+    positions = array.array("q", (pos for (pos, _) in entries))
+    return (k, w, hashes, positions)
+
+
+def pattern_match_minimizer(index: tuple, txt: str, pattern: str) -> array.array:
+    """start positions of all instances of pattern using a minimizer index
+
+    Every occurrence of the pattern contains the pattern's 1st window of w k-mers,
+    so its minimizer (at offset o in the pattern) is indexed at occurrence + o.
+    Only those candidates are verified against txt.
+    Patterns shorter than w + k - 1 fall back to pattern_match.
+
+    Args:
+        index (tuple): (k, w, hashes, positions) from build_minimizer_index
+        txt (str): indexed text
+        pattern (str): pattern to match
+
+    Returns:
+        array.array: starting positions (int64)
+    """
+    (k, w, hashes, positions) = index
+    if len(pattern) < w + k - 1:
+        return pattern_match(txt, pattern)
+
+    pattern_hashes = kmer_hashes(pattern[: w + k - 1], k)
+    offset = min(range(w), key=pattern_hashes.__getitem__)
+    h = pattern_hashes[offset]
+
+    lo = bisect.bisect_left(hashes, h)
+    hi = bisect.bisect_right(hashes, h)
+    result = array.array("q")
+    for pos in positions[lo:hi]:
+        start = pos - offset
+        if start >= 0 and txt.startswith(pattern, start):
+            result.append(start)
+    return result
+
+
 def main():
     """main"""
     args = parse_arguments()
+
+    if index_type(args.data_file):
+        if not args.pattern_file:
+            raise SystemExit("querying a saved index needs --pattern_file")
+        if args.output_format != "text":
+            raise SystemExit("--pattern_file queries are written as text (-f text)")
+        if index_type(args.data_file) == FM_INDEX_MAGIC:
+            index = load_fm_index(args.data_file)
+            match = pattern_match_fm
+        else:
+            index = load_suffix_array_index(args.data_file)
+            match = pattern_match_index
+        for (i, pattern) in enumerate(parse_pattern_file(args.pattern_file)):
+            result = match(index, pattern)
+            write_positions(
+                result, args.output_file, prefix=f"{pattern}: ", append=i > 0
+            )
+        return
+
+    if args.stream:
+        result = pattern_match_stream(args.data_file, args.chunk_size)
+        write_positions(result, args.output_file, args.output_format, "matches: ")
+        return
+
     (txt, pattern) = parse_file(args.data_file)
-    print(args.data_file, txt, pattern)
 
-    result = pattern_match(txt, pattern)
-    print(f"matches: {' '.join(str(e) for e in result)}")
+    if args.save_index and args.fm_index:
+        save_fm_index(txt, args.save_index, args.occ_rate, args.sa_rate)
+        print(f"index saved: {args.save_index}")
+        return
+    if args.save_index:
+        save_suffix_array_index(txt, args.save_index)
+        print(f"index saved: {args.save_index}")
+        return
+
+    if args.minimizer:
+        if not args.pattern_file:
+            raise SystemExit("--minimizer needs --pattern_file")
+        if args.output_format != "text":
+            raise SystemExit("--pattern_file queries are written as text (-f text)")
+        (k, w) = args.minimizer
+        if not 1 <= k <= 31 or w < 1:
+            raise SystemExit("--minimizer K W needs 1 <= K <= 31 and W >= 1")
+        index = build_minimizer_index(txt, k, w)
+        for (i, pattern) in enumerate(parse_pattern_file(args.pattern_file)):
+            result = pattern_match_minimizer(index, txt, pattern)
+            write_positions(
+                result, args.output_file, prefix=f"{pattern}: ", append=i > 0
+            )
+        return
+
+    # keep stdout for the positions when they are written as binary
+    echo = sys.stdout if args.output_format == "text" else sys.stderr
+    print(args.data_file, txt, pattern, file=echo)
+
+    if args.processes:
+        result = pattern_match_parallel(txt, pattern, args.processes)
+    else:
+        result = pattern_match(txt, pattern)
+    write_positions(result, args.output_file, args.output_format, "matches: ")
 
 
 if __name__ == "__main__":
@@ -9,7 +9,10 @@
 
 """
 import argparse
+import array
 import collections
+import multiprocessing
+import os
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -22,6 +25,37 @@ def parse_arguments() -> argparse.Namespace:
         description="Find all distinct k-mers forming (L,t) clumps"
     )
     parser.add_argument("data_file", help="input - 1st line - genome; 2nd line k L t")
+    parser.add_argument(
+        "-e",
+        "--events",
+        help="use the O(n) threshold-event engine (integer k-mer codes, 4^k counts)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        help="scan overlapping genome partitions over this many worker processes",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "--fasta",
+        help="data_file is a (multi-record) FASTA file, streamed one record at a "
+        "time; report record, k-mer and the 1st window start where it forms a clump",
+        nargs=3,
+        type=int,
+        metavar=("K", "L", "T"),
+        required=False,
+    )
+    parser.add_argument(
+        "--sweep",
+        help="scan once for several L,t pairs (e.g. 500,3 1000,4) with k from "
+        "data_file; L t on line 2 of data_file are ignored",
+        nargs="+",
+        metavar="L,t",
+        type=lambda pair: tuple(int(e) for e in pair.split(",")),
+        required=False,
+    )
     args = parser.parse_args()
     return args
 
@@ -77,12 +111,339 @@ def find_clumps_faster(
     return result
 
 
+# byte -> 2-bit symbol code (A=0, C=1, G=2, T=3)
+SYMBOL_TABLE = bytes.maketrans(b"ACGTacgt", bytes([0, 1, 2, 3, 0, 1, 2, 3]))
+
+# as SYMBOL_TABLE, but every other byte (N, IUPAC codes, ...) -> 4 (a break)
+FASTA_SYMBOL_TABLE = bytes(
+    SYMBOL_TABLE[b] if chr(b) in "ACGTacgt" else 4 for b in range(256)
+)
+
+
+def kmer_codes(genome: str, k: int) -> list:
+    """compute the frequency array index (pattern_to_number) of every k-mer
+        Assumes only ACGT in the genome
+
+    Args:
+        genome (str): genome
+        k (int): k-mer length
+
+    Returns:
+        list: code of the k-mer starting at each position
+    """
+    mask = 4**k - 1
+    result = []
+    code = 0
+    for (i, symbol) in enumerate(genome.encode().translate(SYMBOL_TABLE)):
+        code = ((code << 2) | symbol) & mask
+        if i >= k - 1:
+            result.append(code)
+    return result
+
+
+def number_to_pattern(index: int, k: int) -> str:
+    """Convert a k-mer code back to its pattern
+
+    Args:
+        index (int): k-mer code
+        k (int): k-mer length
+
+    Returns:
+        str: pattern
+    """
+    symbols = []
+    for _ in range(k):
+        symbols.append("ACGT"[index & 3])
+        index >>= 2
+    return "".join(reversed(symbols))
+
+
+def find_clumps_events(
+    genome: str, k: int, interval_length: int, min_frequency: int
+) -> set:
+    """Find all distinct k-mers forming (L,t) clumps
+        Assumes only ACGT in the genome
+
+    k-mer counts for the current window live in a flat 4^k array. A k-mer can
+    only start forming a clump when its count is incremented to exactly t,
+    so it is recorded at that moment (once - a 4^k bitmap tracks what was
+    already reported) and the window never has to be rescanned: O(n + 4^k).
+
+    Args:
+        genome (str): genome
+        k (int): k-mer length (k)
+        interval_length(int): interval length (L)
+        min_freq (int): minimum frequency (t)
+
+    Returns:
+        set: all k-mers in any interval that appear in frequency >= t
+    """
+    codes = kmer_codes(genome, k)
+    kmers_per_window = interval_length - k + 1
+    if len(genome) < interval_length or kmers_per_window <= 0:
+        return set()
+
+    counts = array.array("l", [0]) * 4**k
+    reported = bytearray(4**k // 8 + 1)
+    clumps = []
+
+    def add(code: int):
+        counts[code] += 1
+        if counts[code] == min_frequency and not reported[code >> 3] >> (code & 7) & 1:
+            reported[code >> 3] |= 1 << (code & 7)
+            clumps.append(code)
+
+    for code in codes[:kmers_per_window]:
+        add(code)
+    for i in range(kmers_per_window, len(codes)):
+        counts[codes[i - kmers_per_window]] -= 1
+        add(codes[i])
+
+    return {number_to_pattern(code, k) for code in clumps}
+
+
+def find_clumps_sweep(genome: str, k: int, parameters: list) -> dict:
+    """Find all distinct k-mers forming (L,t) clumps for several (L,t) pairs at once
+
+    One k-mer code stream drives a sliding window (flat 4^k count array) per
+    distinct L; each (L,t) pair records k-mers when their count in the L window
+    is incremented to exactly t, as in find_clumps_events.
+
+    Args:
+        genome (str): genome
+        k (int): k-mer length (k)
+        parameters (list): (interval length L, minimum frequency t) pairs
+
+    Returns:
+        dict: (L, t) -> set of all k-mers in any L interval appearing >= t times
+    """
+    codes = kmer_codes(genome, k)
+    result = {(L, t): set() for (L, t) in parameters}
+
+    # windows shorter than the genome never fill, so they have no clumps
+    windows = []  # (# k-mers per window, counts, {t: (reported bitmap, clumps)})
+    for L in sorted({L for (L, _) in parameters}):
+        if L < k or L > len(genome):
+            continue
+        thresholds = {
+            t: (bytearray(4**k // 8 + 1), []) for (L2, t) in parameters if L2 == L
+        }
+        windows.append((L - k + 1, array.array("l", [0]) * 4**k, thresholds))
+
+    for (i, code) in enumerate(codes):
+        for (kmers_per_window, counts, thresholds) in windows:
+            if i >= kmers_per_window:
+                counts[codes[i - kmers_per_window]] -= 1
+            counts[code] += 1
+            if counts[code] in thresholds:
+                (reported, clumps) = thresholds[counts[code]]
+                if not reported[code >> 3] >> (code & 7) & 1:
+                    reported[code >> 3] |= 1 << (code & 7)
+                    clumps.append(code)
+
+    for (kmers_per_window, _, thresholds) in windows:
+        for (t, (_, clumps)) in thresholds.items():
+            result[(kmers_per_window + k - 1, t)] = {
+                number_to_pattern(code, k) for code in clumps
+            }
+    return result
+
+
+def iter_fasta_records(filename: str):
+    """Iterate over the records of a FASTA file without loading a whole record
+
+    Args:
+        filename (str): FASTA file
+
+    Yields:
+        tuple: (record name, iterator over the record's sequence lines)
+    """
+    with open(filename) as f:
+        line = f.readline()
+        while line:
+            if not line.startswith(">"):
+                line = f.readline()
+                continue
+            tokens = line[1:].split()
+            name = tokens[0] if tokens else ""
+            pending = []  # the line following the record, once seen
+
+            def sequence_lines():
+                while True:
+                    next_line = f.readline()
+                    if not next_line or next_line.startswith(">"):
+                        pending.append(next_line)
+                        return
+                    yield next_line.strip()
+
+            lines = sequence_lines()
+            yield (name, lines)
+            for _ in lines:  # skip whatever the caller did not read
+                pass
+            line = pending[0]
+
+
+def find_clumps_fasta(filename: str, k: int, interval_length: int, min_frequency: int):
+    """Find the (L,t) clump k-mers of every record of a FASTA file
+
+    Records are streamed: only the k-mer codes of the current L window
+    (plus the 4^k counts and reported bitmap, reset between records) are kept,
+    so memory does not depend on record or assembly size.
+    Any byte other than ACGT (e.g. an N gap) breaks the sequence: the scan
+    restarts after it, so no k-mer or L window spans the break.
+
+    Args:
+        filename (str): FASTA file
+        k (int): k-mer length (k)
+        interval_length(int): interval length (L)
+        min_freq (int): minimum frequency (t)
+
+    Yields:
+        tuple: (record name, k-mer, start of the 1st L window (0-based in the
+            record) where it appears >= t times), per record in order of that window
+    """
+    mask = 4**k - 1
+    kmers_per_window = interval_length - k + 1
+    counts = array.array("l", [0]) * 4**k
+    reported = bytearray(4**k // 8 + 1)
+
+    for (name, lines) in iter_fasta_records(filename):
+        window = collections.deque()
+        clumps = []  # codes reported for this record
+        pending = []  # clumps found before the 1st window of the run is complete
+        (code, position) = (0, 0)  # position = # bases read in the current run
+        offset = 0  # # bytes of the record before the current run
+        for line in lines:
+            for symbol in line.encode().translate(FASTA_SYMBOL_TABLE):
+                if symbol > 3:
+                    # break: drop the run; its pending clumps had no full window
+                    for code in window:
+                        counts[code] -= 1
+                    window.clear()
+                    for code in pending:
+                        reported[code >> 3] &= ~(1 << (code & 7)) & 0xFF
+                    pending = []
+                    offset += position + 1
+                    (code, position) = (0, 0)
+                    continue
+                code = ((code << 2) | symbol) & mask
+                position += 1
+                if position < k:
+                    continue
+                if len(window) == kmers_per_window:
+                    counts[window.popleft()] -= 1
+                window.append(code)
+                counts[code] += 1
+                if counts[code] == min_frequency and not (
+                    reported[code >> 3] >> (code & 7) & 1
+                ):
+                    reported[code >> 3] |= 1 << (code & 7)
+                    clumps.append(code)
+                    if position < interval_length:
+                        pending.append(code)
+                    else:
+                        start = offset + position - interval_length
+                        yield (name, number_to_pattern(code, k), start)
+                if position == interval_length:
+                    for clump in pending:
+                        yield (name, number_to_pattern(clump, k), offset)
+                    pending = []
+
+        # reset the shared tables for the next record
+        for code in window:
+            counts[code] -= 1
+        for code in clumps:
+            reported[code >> 3] &= ~(1 << (code & 7)) & 0xFF
+
+
+def find_clumps_partition(task: tuple) -> set:
+    """worker: find the clumps of one genome partition
+
+    Args:
+        task (tuple): (partition, k, L, t, use find_clumps_events)
+
+    Returns:
+        set: clump k-mers of the partition
+    """
+    (partition, k, interval_length, min_frequency, events) = task
+    find = find_clumps_events if events else find_clumps_faster
+    return find(partition, k, interval_length, min_frequency)
+
+
+def find_clumps_parallel(
+    genome: str,
+    k: int,
+    interval_length: int,
+    min_frequency: int,
+    processes: int = None,
+    events: bool = False,
+) -> set:
+    """Find all distinct k-mers forming (L,t) clumps over a process pool
+
+    The window start positions are split into one range per worker; each
+    partition extends L - 1 bases past its last window start, so every window
+    lies wholly inside exactly one partition and the union is the serial result.
+
+    Args:
+        genome (str): genome
+        k (int): k-mer length (k)
+        interval_length(int): interval length (L)
+        min_freq (int): minimum frequency (t)
+        processes (int): # worker processes (default: os.cpu_count())
+        events (bool): scan partitions with find_clumps_events
+
+    Returns:
+        set: all k-mers in any interval that appear in frequency >= t
+    """
+    n_windows = len(genome) - interval_length + 1
+    if n_windows <= 0:
+        return set()
+
+    processes = processes or os.cpu_count()
+    size = -(-n_windows // processes)
+    tasks = [
+        (
+            genome[start : min(start + size, n_windows) + interval_length - 1],
+            k,
+            interval_length,
+            min_frequency,
+            events,
+        )
+        for start in range(0, n_windows, size)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        partial_results = pool.map(find_clumps_partition, tasks)
+
+    result = set()
+    for partial_result in partial_results:
+        result.update(partial_result)
+    return result
+
+
 def main():
     """main"""
     args = parse_arguments()
+
+    if args.fasta:
+        for (name, kmer, start) in find_clumps_fasta(args.data_file, *args.fasta):
+            print(f"{name} {kmer} {start}")
+        return
+
     (genome, k, interval_length, min_frequency) = parse_file(args.data_file)
 
-    result = find_clumps_faster(genome, k, interval_length, min_frequency)
+    if args.sweep:
+        for ((L, t), result) in find_clumps_sweep(genome, k, args.sweep).items():
+            print(f"{L} {t}: {' '.join(sorted(result))}")
+        return
+
+    if args.processes:
+        result = find_clumps_parallel(
+            genome, k, interval_length, min_frequency, args.processes, args.events
+        )
+    elif args.events:
+        result = find_clumps_events(genome, k, interval_length, min_frequency)
+    else:
+        result = find_clumps_faster(genome, k, interval_length, min_frequency)
     result = sorted(result)
     print(" ".join(result))
 
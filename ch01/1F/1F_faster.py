@@ -0,0 +1,473 @@
+# /usr/bin/env python3
+"""Bioinformatics Algorithms Ch 01 Problem 1F
+   Given a genome, find all positions that minimize the skew
+   (skew computed with NumPy - requires numpy)
+
+"""
+import argparse
+import mmap
+import sys
+
+import numpy as np
+
+# skew step for each byte: G = +1, C = -1 (either case), anything else 0
+SKEW_DELTAS = np.zeros(256, dtype=np.int8)
+SKEW_DELTAS[[ord("G"), ord("g")]] = 1
+SKEW_DELTAS[[ord("C"), ord("c")]] = -1
+
+
+def parse_arguments() -> argparse.Namespace:
+    """parse arguments
+
+    Returns:
+        argparse.Namespace: argument object
+    """
+    parser = argparse.ArgumentParser(
+        description="Given a DNA sequence, compute indices of min skew"
+    )
+    parser.add_argument(
+        "data_file",
+        help="1 line DNA sequence; or a skew index saved with --save_index",
+    )
+    parser.add_argument(
+        "--save_index",
+        help="build a range-minimum skew index and save it to this file",
+        required=False,
+    )
+    parser.add_argument(
+        "-r",
+        "--range",
+        help="report the min skew and its positions in [A, B] (repeatable)",
+        nargs=2,
+        type=int,
+        metavar=("A", "B"),
+        action="append",
+        required=False,
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        help="write GC skew / cumulative skew summaries over windows of each size "
+        "(e.g. 1000 10000 100000), streaming the sequence once",
+        nargs="+",
+        type=int,
+        metavar="WINDOW",
+        required=False,
+    )
+    parser.add_argument(
+        "-o", "--output_file", help="output file for --profile", required=False
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        help="read the sequence in chunks straight from the file (bounded memory)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk_size",
+        help="chunk size in bytes for --stream",
+        type=int,
+        default=1 << 24,
+        required=False,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def parse_file(filename: str) -> str:
+    """Parse file
+
+    Args:
+        filename (str): file - DNA sequence
+
+    Returns:
+        str: dna_sequence
+    """
+    with open(filename) as f:
+        lines = f.readlines()
+        dna_sequence = lines[0].strip()
+    return dna_sequence
+
+
+def locate_lines(mm: mmap.mmap, n: int) -> list:
+    """Locate the first n lines of a mapped file without reading them
+
+    Args:
+        mm (mmap.mmap): mapped file
+        n (int): # lines
+
+    Returns:
+        list: (start, end) byte offsets of each line, surrounding whitespace excluded
+    """
+    result = []
+    pos = 0
+    for _ in range(n):
+        eol = mm.find(b"\n", pos)
+        if eol == -1:
+            eol = len(mm)
+        (start, end) = (pos, eol)
+        while start < end and mm[start : start + 1].isspace():
+            start += 1
+        while end > start and mm[end - 1 : end].isspace():
+            end -= 1
+        result.append((start, end))
+        pos = min(eol + 1, len(mm))
+    return result
+
+
+def skew_steps(sequence: bytes) -> np.ndarray:
+    """map each base to its skew step with a lookup table
+
+    Args:
+        sequence (bytes): DNA sequence
+
+    Returns:
+        np.ndarray: int8 array - +1 for G, -1 for C, 0 otherwise
+    """
+    return SKEW_DELTAS[np.frombuffer(sequence, dtype=np.uint8)]
+
+
+def min_skew_faster(sequence: str) -> list:
+    """compute the positions of minimum skew  (#G - #C)
+
+    Args:
+        sequence (str): DNA sequence
+
+    Returns:
+        list: indices of all positions minimizing skew
+    """
+    skew = np.zeros(len(sequence) + 1, dtype=np.int64)
+    np.cumsum(skew_steps(sequence.encode()), out=skew[1:])
+
+    result = np.flatnonzero(skew == skew.min()).tolist()
+    return result
+
+
+def min_skew_stream(filename: str, chunk_size: int = 1 << 24) -> list:
+    """compute the positions of minimum skew  (#G - #C), reading the file in chunks
+    Only the running skew, the current minimum and its positions are carried
+    between chunks, so memory is O(chunk_size) whatever the genome length
+
+    Args:
+        filename (str): file - DNA sequence
+        chunk_size (int): # bytes per chunk
+
+    Returns:
+        list: indices of all positions minimizing skew
+    """
+    (min_value, result) = (0, [0])
+    running = 0
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ((start, end),) = locate_lines(mm, 1)
+            for offset in range(start, end, chunk_size):
+                skew = np.cumsum(
+                    skew_steps(mm[offset : min(offset + chunk_size, end)]),
+                    dtype=np.int64,
+                )
+                skew += running
+                chunk_min = skew.min()
+                if chunk_min <= min_value:
+                    positions = np.flatnonzero(skew == chunk_min) + offset - start + 1
+                    if chunk_min < min_value:
+                        (min_value, result) = (chunk_min, [])
+                    result.extend(positions.tolist())
+                running = skew[-1]
+    return result
+
+
+def skew_profile(filename: str, window_sizes: list, chunk_size: int = 1 << 24) -> dict:
+    """summarize the skew over fixed windows at several resolutions in one pass
+
+    The file is read in chunks; each chunk is reduced per resolution with
+    np.add.reduceat / np.minimum.reduceat over the window boundaries inside it,
+    and the partial last window of each resolution (G - C sum, GC count,
+    min skew, skew at end) is carried into the next chunk, so the n + 1 skew
+    values are never held at once.
+
+    Args:
+        filename (str): file - DNA sequence
+        window_sizes (list): window sizes (bases)
+        chunk_size (int): # bytes per chunk
+
+    Returns:
+        dict: window size -> float array with 1 row per window:
+            start, end, GC skew (G - C) / (G + C), skew at end, min skew in window
+    """
+    parts = {size: [] for size in window_sizes}
+    # open window per size: (start, G - C, GC count, skew at end, min skew)
+    carried = {}
+    running = 0
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ((start, end),) = locate_lines(mm, 1)
+            length = end - start
+
+            def add_windows(size: int, starts, diff, gc, skew_end, skew_min):
+                """append finished windows of one size as profile rows"""
+                gc_skew = np.divide(
+                    diff, gc, out=np.zeros(len(gc)), where=np.asarray(gc) > 0
+                )
+                parts[size].append(
+                    np.column_stack(
+                        [
+                            starts,
+                            np.minimum(np.asarray(starts) + size, length),
+                            gc_skew,
+                            skew_end,
+                            skew_min,
+                        ]
+                    )
+                )
+
+            for offset in range(start, end, chunk_size):
+                steps = skew_steps(mm[offset : min(offset + chunk_size, end)])
+                skew = np.cumsum(steps, dtype=np.int64)
+                skew += running
+                running = skew[-1]
+                is_gc = (steps != 0).astype(np.int64)
+                base = offset - start
+                for size in window_sizes:
+                    # segments: the rest of the open window, then whole windows
+                    first = -base % size
+                    cuts = np.arange(first, len(steps), size)
+                    if first:
+                        cuts = np.insert(cuts, 0, 0)
+                    starts = base + cuts
+                    diff = np.add.reduceat(steps, cuts, dtype=np.int64)
+                    gc = np.add.reduceat(is_gc, cuts)
+                    skew_min = np.minimum.reduceat(skew, cuts)
+                    skew_end = skew[np.append(cuts[1:], len(steps)) - 1]
+                    if first:
+                        (starts[0], d, g, _, m) = carried.pop(size)
+                        (diff[0], gc[0]) = (diff[0] + d, gc[0] + g)
+                        skew_min[0] = min(skew_min[0], m)
+                    if starts[-1] + size > base + len(steps):
+                        carried[size] = (
+                            starts[-1],
+                            diff[-1],
+                            gc[-1],
+                            skew_end[-1],
+                            skew_min[-1],
+                        )
+                        (starts, diff, gc) = (starts[:-1], diff[:-1], gc[:-1])
+                        (skew_end, skew_min) = (skew_end[:-1], skew_min[:-1])
+                    if len(starts):
+                        add_windows(size, starts, diff, gc, skew_end, skew_min)
+
+            # the last window of each size ends with the sequence
+            for (size, (s, d, g, e, m)) in carried.items():
+                add_windows(size, [s], [d], [g], [e], [m])
+
+    return {
+        size: np.concatenate(rows) if rows else np.zeros((0, 5))
+        for (size, rows) in parts.items()
+    }
+
+
+def write_skew_profile(profile: dict, f):
+    """write a skew profile as tab-separated text
+
+    Args:
+        profile (dict): from skew_profile
+        f (file): text file
+    """
+    f.write("window\tstart\tend\tgc_skew\tskew_end\tskew_min\n")
+    for (size, rows) in profile.items():
+        for (start, end, gc_skew, skew_end, skew_min) in rows.tolist():
+            f.write(
+                f"{size}\t{int(start)}\t{int(end)}\t{gc_skew:.6f}"
+                f"\t{int(skew_end)}\t{int(skew_min)}\n"
+            )
+
+
+INDEX_MAGIC = b"PK\x03\x04"  # np.savez writes a zip archive
+
+
+def build_skew_index(sequence: str, block_size: int = 1024) -> tuple:
+    """build a range-minimum index over the skew of a DNA sequence
+
+    The skew (n + 1 values) is cut into blocks; a sparse table over the blocks
+    stores, for every run of 2^j blocks, the leftmost position of its minimum.
+
+    Args:
+        sequence (str): DNA sequence
+        block_size (int): # skew values per block
+
+    Returns:
+        tuple: (skew, block_size, levels)
+            skew - int64 array of the skew at positions 0..n
+            levels - levels[j][i] = leftmost argmin of blocks i .. i + 2^j - 1
+    """
+    skew = np.zeros(len(sequence) + 1, dtype=np.int64)
+    np.cumsum(skew_steps(sequence.encode()), out=skew[1:])
+
+    n_blocks = -(-len(skew) // block_size)
+    padded = np.full(n_blocks * block_size, np.iinfo(np.int64).max, dtype=np.int64)
+    padded[: len(skew)] = skew
+    block_argmin = padded.reshape(n_blocks, -1).argmin(axis=1)
+    level = np.arange(n_blocks) * block_size + block_argmin
+    levels = [level]
+    width = 1
+    while 2 * width <= n_blocks:
+        (left, right) = (level[:-width], level[width:])
+        level = np.where(skew[right] < skew[left], right, left)
+        levels.append(level)
+        width *= 2
+    return (skew, block_size, levels)
+
+
+def save_skew_index(index: tuple, filename: str):
+    """save a skew index (NumPy .npz archive)
+
+    Args:
+        index (tuple): (skew, block_size, levels) from build_skew_index
+        filename (str): output file
+    """
+    (skew, block_size, levels) = index
+    with open(filename, "wb") as f:
+        np.savez(
+            f,
+            skew=skew,
+            block_size=block_size,
+            **{f"level{j}": level for (j, level) in enumerate(levels)},
+        )
+
+
+def load_skew_index(filename: str) -> tuple:
+    """load a skew index written by save_skew_index
+
+    Args:
+        filename (str): index file
+
+    Returns:
+        tuple: (skew, block_size, levels)
+    """
+    with np.load(filename) as data:
+        n_levels = sum(1 for key in data.files if key.startswith("level"))
+        levels = [data[f"level{j}"] for j in range(n_levels)]
+        return (data["skew"], int(data["block_size"]), levels)
+
+
+def range_min(index: tuple, a: int, b: int) -> tuple:
+    """minimum skew at positions a..b (inclusive) - O(block_size) vector work
+    for the partial blocks, O(1) sparse table lookups for the rest
+
+    Args:
+        index (tuple): (skew, block_size, levels) from build_skew_index
+        a (int): 1st position
+        b (int): last position
+
+    Returns:
+        tuple: (min skew, leftmost position with that skew)
+    """
+    (skew, block_size, levels) = index
+    (block_a, block_b) = (a // block_size, b // block_size)
+    if block_a == block_b:
+        pos = a + int(skew[a : b + 1].argmin())
+        return (int(skew[pos]), pos)
+
+    left_end = (block_a + 1) * block_size
+    candidates = [
+        a + int(skew[a:left_end].argmin()),
+        block_b * block_size + int(skew[block_b * block_size : b + 1].argmin()),
+    ]
+    if block_b - block_a > 1:
+        (first, last) = (block_a + 1, block_b - 1)
+        j = (last - first + 1).bit_length() - 1
+        candidates.append(int(levels[j][first]))
+        candidates.append(int(levels[j][last - (1 << j) + 1]))
+
+    pos = min(candidates, key=lambda p: (skew[p], p))
+    return (int(skew[pos]), pos)
+
+
+def range_min_skew(index: tuple, a: int, b: int) -> tuple:
+    """minimum skew and all positions reaching it between positions a and b
+    Each position found splits the range in two; O(1 + # positions) range_min calls
+
+    Args:
+        index (tuple): (skew, block_size, levels) from build_skew_index
+        a (int): 1st position
+        b (int): last position (inclusive)
+
+    Returns:
+        tuple: (min skew, sorted list of positions minimizing skew in [a, b]);
+            (None, []) if [a, b] holds no position 0..n
+    """
+    n = len(index[0]) - 1
+    (a, b) = (max(a, 0), min(b, n))
+    if a > b:
+        return (None, [])
+    (min_value, _) = range_min(index, a, b)
+    result = []
+    ranges = [(a, b)]
+    while ranges:
+        (lo, hi) = ranges.pop()
+        if lo > hi:
+            continue
+        (value, pos) = range_min(index, lo, hi)
+        if value == min_value:
+            result.append(pos)
+            ranges.extend([(lo, pos - 1), (pos + 1, hi)])
+    return (min_value, sorted(result))
+
+
+def is_index_file(filename: str) -> bool:
+    """check whether a file is a skew index written by save_skew_index
+
+    Args:
+        filename (str): file
+
+    Returns:
+        bool: True if the file starts with the index header
+    """
+    with open(filename, "rb") as f:
+        return f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+
+
+def main():
+    """main"""
+    args = parse_arguments()
+
+    if args.profile:
+        profile = skew_profile(args.data_file, args.profile, args.chunk_size)
+        if args.output_file:
+            with open(args.output_file, "w") as f:
+                write_skew_profile(profile, f)
+        else:
+            write_skew_profile(profile, sys.stdout)
+        return
+
+    if args.save_index:
+        index = build_skew_index(parse_file(args.data_file))
+        save_skew_index(index, args.save_index)
+        print(f"index saved: {args.save_index}")
+        return
+
+    if args.range:
+        if is_index_file(args.data_file):
+            index = load_skew_index(args.data_file)
+        else:
+            index = build_skew_index(parse_file(args.data_file))
+        for (a, b) in args.range:
+            if a > b:
+                raise SystemExit(f"--range {a} {b}: start is after end")
+            (value, positions) = range_min_skew(index, a, b)
+            if value is None:
+                print(f"{a} {b}:")
+            else:
+                print(f"{a} {b}: {value} {' '.join(str(e) for e in positions)}")
+        return
+
+    if args.stream:
+        result = min_skew_stream(args.data_file, args.chunk_size)
+    else:
+        sequence = parse_file(args.data_file)
+        result = min_skew_faster(sequence)
+    print(" ".join(str(e) for e in result))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # /usr/bin/env python3
 """Bioinformatics Algorithms Ch 01 Problem 1G
    Find the Hamming distance between 2 strings
+   (or the stored k-mers within distance d of each query, via a block-hash index)
 
 """
 import argparse
@@ -16,6 +17,21 @@ def parse_arguments() -> argparse.Namespace:
         description="Find the Hamming distance between 2 strings - assume same length"
     )
     parser.add_argument("data_file", help="2-line file - 1 per string")
+    parser.add_argument(
+        "-q",
+        "--query_file",
+        help="data_file holds stored k-mers and this file the queries (1 per line); "
+        "report the stored k-mers within --distance of each query",
+        required=False,
+    )
+    parser.add_argument(
+        "-d",
+        "--distance",
+        help="maximum Hamming distance for --query_file",
+        type=int,
+        default=0,
+        required=False,
+    )
     args = parser.parse_args()
     return args
 
@@ -36,6 +52,20 @@ def parse_file(filename: str) -> tuple:
     return (str1, str2)
 
 
+def parse_kmer_file(filename: str) -> list:
+    """Parse k-mer file
+
+    Args:
+        filename (str): file - 1 k-mer per line (blank lines skipped)
+
+    Returns:
+        list: k-mers in file order
+    """
+    with open(filename) as f:
+        kmers = [line.strip() for line in f if line.strip()]
+    return kmers
+
+
 def hamming(str1: str, str2: str) -> int:
     """Find the Hamming distance between 2 strings of equal length
 
@@ -54,9 +84,100 @@ def hamming(str1: str, str2: str) -> int:
     return result
 
 
+def hamming_within(str1: str, str2: str, d: int) -> int:
+    """Find the Hamming distance between 2 strings of equal length, if <= d
+        Stops comparing as soon as the distance exceeds d
+
+    Args:
+        str1 (str): string 1
+        str2 (str): string 2
+        d (int): maximum Hamming distance
+
+    Returns:
+        int: Hamming distance, or -1 if > d
+    """
+    result = 0
+    for (a, b) in zip(str1, str2):
+        if a != b:
+            result += 1
+            if result > d:
+                return -1
+
+    return result
+
+
+def block_bounds(k: int, n_blocks: int) -> list:
+    """split k positions into n_blocks contiguous blocks of near-equal length
+
+    Args:
+        k (int): k-mer length
+        n_blocks (int): # blocks
+
+    Returns:
+        list: (start, end) of each block
+    """
+    return [(k * i // n_blocks, k * (i + 1) // n_blocks) for i in range(n_blocks)]
+
+
+def build_hamming_index(kmers: list, d: int) -> tuple:
+    """build a multi-index hash over k-mers of equal length for distance <= d
+    By pigeonhole, 2 k-mers within distance d agree exactly on at least 1 of
+    d+1 disjoint blocks, so each block gets a hash table of block -> k-mer ids.
+    If k < d+1 some blocks are empty and every k-mer is a candidate.
+
+    Args:
+        kmers (list): k-mers of equal length
+        d (int): maximum Hamming distance of queries
+
+    Returns:
+        tuple: (kmers, d, bounds, tables) - tables[b] maps block b to ids in kmers
+    """
+    k = len(kmers[0]) if kmers else 0
+    bounds = block_bounds(k, d + 1)
+    tables = [{} for _ in bounds]
+    for (i, kmer) in enumerate(kmers):
+        for ((start, end), table) in zip(bounds, tables):
+            table.setdefault(kmer[start:end], []).append(i)
+    return (kmers, d, bounds, tables)
+
+
+def query_hamming_index(index: tuple, query: str) -> list:
+    """Find the stored k-mers within the index distance of a query
+    Each block of the query is looked up in its table; only the k-mers
+    sharing a block are compared in full
+
+    Args:
+        index (tuple): from build_hamming_index
+        query (str): k-mer of the indexed length
+
+    Returns:
+        list: (id in kmers, distance) pairs in id order
+    """
+    (kmers, d, bounds, tables) = index
+    candidates = set()
+    for ((start, end), table) in zip(bounds, tables):
+        candidates.update(table.get(query[start:end], ()))
+
+    result = []
+    for i in sorted(candidates):
+        distance = hamming_within(query, kmers[i], d)
+        if distance >= 0:
+            result.append((i, distance))
+    return result
+
+
 def main():
     """main"""
     args = parse_arguments()
+
+    if args.query_file:
+        kmers = parse_kmer_file(args.data_file)
+        index = build_hamming_index(kmers, args.distance)
+        for query in parse_kmer_file(args.query_file):
+            matches = query_hamming_index(index, query)
+            print(f"{query}: " + " ".join(kmers[i] for (i, _) in matches))
+        return
+
     (str1, str2) = parse_file(args.data_file)
 
     result = hamming(str1, str2)
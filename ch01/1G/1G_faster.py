@@ -0,0 +1,240 @@
+# /usr/bin/env python3
+"""Bioinformatics Algorithms Ch 01 Problem 1G
+   Find the Hamming distance between 2 strings
+   (batch distances between 2 sets of DNA k-mers with NumPy - requires numpy >= 2.0)
+
+"""
+import argparse
+
+import numpy as np
+
+# 2-bit code for each byte: A=0, C=1, G=2, T=3 (either case)
+SYMBOL_CODES = np.zeros(256, dtype=np.uint8)
+for (symbols, code) in (("Aa", 0), ("Cc", 1), ("Gg", 2), ("Tt", 3)):
+    for symbol in symbols:
+        SYMBOL_CODES[ord(symbol)] = code
+
+# low bit of every 2-bit group in a 64-bit word
+LOW_BITS = np.uint64(0x5555555555555555)
+
+# packed_distances work space per k-mer pair: 2 uint64 scratch + uint8 + uint16
+# result, and the <= distance mask in hamming_pairs
+BYTES_PER_PAIR = 8 + 8 + 1 + 2 + 1
+
+
+def parse_arguments() -> argparse.Namespace:
+    """parse arguments
+
+    Returns:
+        argparse.Namespace: argument object
+    """
+    parser = argparse.ArgumentParser(
+        description="Find the Hamming distance between 2 strings - assume same length"
+    )
+    parser.add_argument("data_file", help="2-line file - 1 per string")
+    parser.add_argument(
+        "-b",
+        "--batch",
+        help="data_file and this file each hold a set of k-mers (1 per line); "
+        "report every distance between the 2 sets",
+        required=False,
+    )
+    parser.add_argument(
+        "-d",
+        "--distance",
+        help="with --batch, only report the pairs within this distance",
+        type=int,
+        required=False,
+    )
+    args = parser.parse_args()
+    return args
+
+
+def parse_file(filename: str) -> tuple:
+    """Parse file
+
+    Args:
+        filename (str): file - 2 lines
+
+    Returns:
+        tuple: (str1, str2)
+    """
+    with open(filename) as f:
+        lines = f.readlines()
+        str1 = lines[0].strip()
+        str2 = lines[1].strip()
+    return (str1, str2)
+
+
+def parse_kmer_file(filename: str) -> list:
+    """Parse k-mer file
+
+    Args:
+        filename (str): file - 1 k-mer per line (blank lines skipped)
+
+    Returns:
+        list: k-mers in file order
+    """
+    with open(filename) as f:
+        kmers = [line.strip() for line in f if line.strip()]
+    return kmers
+
+
+def hamming(str1: str, str2: str) -> int:
+    """Find the Hamming distance between 2 strings of equal length
+
+    Args:
+        str1 (str): string 1
+        str2 (str): string 2
+
+    Returns:
+        int: Hamming distance
+    """
+    result = 0
+    for i in range(len(str1)):
+        if str1[i] != str2[i]:
+            result += 1
+
+    return result
+
+
+def pack_kmers(kmers: list, k: int) -> np.ndarray:
+    """pack equal-length DNA k-mers into 2-bit codes, 32 bases per 64-bit word
+        Assumes only ACGT in the k-mers
+
+    Args:
+        kmers (list): k-mers of equal length k
+        k (int): k-mer length
+
+    Returns:
+        np.ndarray: uint64 array of shape (# k-mers, ceil(k / 32))
+    """
+    n_words = max(1, -(-k // 32))
+    codes = np.zeros((len(kmers), n_words * 32), dtype=np.uint64)
+    if kmers:
+        encoded = np.frombuffer("".join(kmers).encode(), dtype=np.uint8)
+        codes[:, :k] = SYMBOL_CODES[encoded].reshape(len(kmers), k)
+    # padding bases are A (0) in both sets, so they never mismatch
+    shifts = np.arange(62, -1, -2, dtype=np.uint64)
+    codes = codes.reshape(len(kmers), n_words, 32) << shifts
+    return np.bitwise_or.reduce(codes, axis=2)
+
+
+def packed_distances(packed1: np.ndarray, packed2: np.ndarray) -> np.ndarray:
+    """Hamming distances between 2 sets of packed k-mers
+    Works in place in 2 uint64 and 1 uint8 scratch arrays of the result's shape
+
+    Args:
+        packed1 (np.ndarray): from pack_kmers
+        packed2 (np.ndarray): from pack_kmers
+
+    Returns:
+        np.ndarray: uint16 array of shape (len(packed1), len(packed2))
+    """
+    shape = (len(packed1), len(packed2))
+    result = np.zeros(shape, dtype=np.uint16)
+    diff = np.empty(shape, dtype=np.uint64)
+    shifted = np.empty(shape, dtype=np.uint64)
+    counts = np.empty(shape, dtype=np.uint8)
+    for word in range(packed1.shape[1]):
+        np.bitwise_xor(packed1[:, word, np.newaxis], packed2[:, word], out=diff)
+        np.right_shift(diff, np.uint64(1), out=shifted)
+        np.bitwise_or(diff, shifted, out=diff)
+        np.bitwise_and(diff, LOW_BITS, out=diff)
+        result += np.bitwise_count(diff, out=counts)
+    return result
+
+
+def iter_tiles(n_rows: int, n_cols: int, memory_budget: int):
+    """split a n_rows x n_cols matrix into tiles within a scratch memory budget
+
+    Args:
+        n_rows (int): # rows
+        n_cols (int): # columns
+        memory_budget (int): max bytes of packed_distances work space per tile
+
+    Yields:
+        tuple: (row slice, column slice) of each tile, row by row
+    """
+    pairs = max(1, memory_budget // BYTES_PER_PAIR)
+    cols = max(1, min(n_cols, pairs))
+    rows = max(1, pairs // cols)
+    for row in range(0, n_rows, rows):
+        for col in range(0, n_cols, cols):
+            yield (slice(row, row + rows), slice(col, col + cols))
+
+
+def hamming_matrix(
+    kmers1: list, kmers2: list, memory_budget: int = 1 << 26
+) -> np.ndarray:
+    """Find the Hamming distance between every pair of k-mers of 2 sets
+
+    Two bases differ iff either bit of their XOR is set: fold each 2-bit group
+    onto its low bit, mask, and popcount the word.
+
+    Args:
+        kmers1 (list): k-mers of equal length
+        kmers2 (list): k-mers of the same length
+        memory_budget (int): max bytes of scratch space (on top of the result)
+
+    Returns:
+        np.ndarray: uint16 array of shape (len(kmers1), len(kmers2))
+    """
+    k = len((kmers1 or kmers2 or [""])[0])
+    packed1 = pack_kmers(kmers1, k)
+    packed2 = pack_kmers(kmers2, k)
+    result = np.zeros((len(kmers1), len(kmers2)), dtype=np.uint16)
+    for (rows, cols) in iter_tiles(len(kmers1), len(kmers2), memory_budget):
+        result[rows, cols] = packed_distances(packed1[rows], packed2[cols])
+    return result
+
+
+def hamming_pairs(
+    kmers1: list, kmers2: list, distance: int, memory_budget: int = 1 << 26
+) -> np.ndarray:
+    """Find every pair of k-mers of 2 sets within a Hamming distance
+    The distance matrix is only ever held one tile at a time
+
+    Args:
+        kmers1 (list): k-mers of equal length
+        kmers2 (list): k-mers of the same length
+        distance (int): maximum Hamming distance (d)
+        memory_budget (int): max bytes of scratch space (on top of the pairs)
+
+    Returns:
+        np.ndarray: int64 array of (index in kmers1, index in kmers2, distance) rows
+    """
+    k = len((kmers1 or kmers2 or [""])[0])
+    packed1 = pack_kmers(kmers1, k)
+    packed2 = pack_kmers(kmers2, k)
+    result = [np.zeros((0, 3), dtype=np.int64)]
+    for (rows, cols) in iter_tiles(len(kmers1), len(kmers2), memory_budget):
+        tile = packed_distances(packed1[rows], packed2[cols])
+        (i, j) = np.nonzero(tile <= distance)
+        result.append(np.column_stack([i + rows.start, j + cols.start, tile[i, j]]))
+    return np.concatenate(result)
+
+
+def main():
+    """main"""
+    args = parse_arguments()
+
+    if args.batch:
+        kmers1 = parse_kmer_file(args.data_file)
+        kmers2 = parse_kmer_file(args.batch)
+        if args.distance is not None:
+            for (i, j, d) in hamming_pairs(kmers1, kmers2, args.distance).tolist():
+                print(f"{i} {j} {d}")
+        else:
+            for row in hamming_matrix(kmers1, kmers2).tolist():
+                print(" ".join(str(e) for e in row))
+        return
+
+    (str1, str2) = parse_file(args.data_file)
+
+    result = hamming(str1, str2)
+    print(f"{result}")
+
+
+if __name__ == "__main__":
+    main()
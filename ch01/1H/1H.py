@@ -4,6 +4,11 @@
 
 """
 import argparse
+import array
+import bisect
+import itertools
+import sys
+import time
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -16,6 +21,42 @@ def parse_arguments() -> argparse.Namespace:
         description="Find all approximate occurrences of a pattern in a string"
     )
     parser.add_argument("data_file", help="3 line file - pattern, text, int")
+    parser.add_argument(
+        "-o", "--output_file", help="write the positions to this file", required=False
+    )
+    parser.add_argument(
+        "-f",
+        "--output_format",
+        help="text - space separated; varint - LEB128 deltas; npy - NumPy int64 array",
+        choices=["text", "varint", "npy"],
+        default="text",
+    )
+    parser.add_argument(
+        "-b",
+        "--bit_parallel",
+        help="use the bit-parallel matcher (big-int bitsets)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--benchmark",
+        help="time approx_match against the bit-parallel matcher and compare results",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-k",
+        "--kmer_index",
+        help="match with seeds looked up in an index of the text's k-mers, k <= 31 "
+        "(exact for patterns of length >= (d + 1) * k)",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "-q",
+        "--query_file",
+        help="with --kmer_index, patterns (1 per line) to match instead of the "
+        "data_file pattern",
+        required=False,
+    )
     args = parser.parse_args()
     return args
 
@@ -37,6 +78,140 @@ def parse_file(filename: str) -> tuple:
     return (txt, pattern, distance)
 
 
+def parse_pattern_file(filename: str) -> list:
+    """Parse pattern file
+
+    Args:
+        filename (str): file - 1 pattern per line (blank lines skipped)
+
+    Returns:
+        list: patterns in file order
+    """
+    with open(filename) as f:
+        patterns = [line.strip() for line in f if line.strip()]
+    return patterns
+
+
+def write_positions_text(positions, f, batch_size: int = 1 << 16):
+    """write positions as space-separated text, one batch of strings at a time
+
+    Args:
+        positions (iterable): positions (int)
+        f (file): text file
+        batch_size (int): # positions formatted per write
+    """
+    positions = iter(positions)
+    separator = ""
+    while True:
+        batch = " ".join(map(str, itertools.islice(positions, batch_size)))
+        if not batch:
+            break
+        f.write(separator)
+        f.write(batch)
+        separator = " "
+
+
+def encode_varint_deltas(positions) -> bytes:
+    """encode increasing positions as LEB128 varints of the gaps between them
+
+    Args:
+        positions (iterable): positions (int) in increasing order
+
+    Returns:
+        bytes: encoded positions
+    """
+    result = bytearray()
+    previous = 0
+    for pos in positions:
+        (delta, previous) = (pos - previous, pos)
+        while delta >= 0x80:
+            result.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        result.append(delta)
+    return bytes(result)
+
+
+def decode_varint_deltas(data: bytes) -> array.array:
+    """decode positions written by encode_varint_deltas
+
+    Args:
+        data (bytes): encoded positions
+
+    Returns:
+        array.array: positions (int64)
+    """
+    result = array.array("q")
+    (pos, delta, shift) = (0, 0, 0)
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            pos += delta
+            result.append(pos)
+            (delta, shift) = (0, 0)
+    return result
+
+
+def encode_npy(positions) -> bytes:
+    """encode positions as a NumPy .npy file (1-D little-endian int64 array)
+
+    Args:
+        positions (iterable): positions (int)
+
+    Returns:
+        bytes: .npy file contents
+    """
+    values = array.array("q", positions)
+    if sys.byteorder == "big":
+        values.byteswap()
+    header = f"{{'descr': '<i8', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    header = header.ljust(63 - (10 + len(header)) % 64 + len(header)) + "\n"
+    return b"".join(
+        [
+            b"\x93NUMPY\x01\x00",
+            len(header).to_bytes(2, "little"),
+            header.encode(),
+            values.tobytes(),
+        ]
+    )
+
+
+def write_positions(
+    positions,
+    filename: str = None,
+    output_format: str = "text",
+    prefix: str = "",
+    append: bool = False,
+):
+    """write positions to a file (default: stdout)
+
+    Args:
+        positions (iterable): positions (int) in increasing order
+        filename (str): output file (None for stdout)
+        output_format (str): text - space separated; varint - LEB128 deltas; npy - .npy
+        prefix (str): text written before the positions (text format only)
+        append (bool): add a line to filename rather than overwrite (text only)
+    """
+    if output_format == "text":
+        f = open(filename, "a" if append else "w") if filename else sys.stdout
+        try:
+            f.write(prefix)
+            write_positions_text(positions, f)
+            f.write("\n")
+        finally:
+            if filename:
+                f.close()
+        return
+
+    encode = encode_npy if output_format == "npy" else encode_varint_deltas
+    if filename:
+        with open(filename, "wb") as f:
+            f.write(encode(positions))
+    else:
+        sys.stdout.flush()  # text already written must precede the binary data
+        sys.stdout.buffer.write(encode(positions))
+
+
 def hamming(str1: str, str2: str) -> int:
     """Find the Hamming distance between 2 strings of equal length
 
@@ -55,7 +230,29 @@ def hamming(str1: str, str2: str) -> int:
     return result
 
 
-def approx_match(txt: str, pattern: str, distance: int) -> list:
+def hamming_within(str1: str, str2: str, d: int) -> int:
+    """Find the Hamming distance between 2 strings of equal length, if <= d
+        Stops comparing as soon as the distance exceeds d
+
+    Args:
+        str1 (str): string 1
+        str2 (str): string 2
+        d (int): maximum Hamming distance
+
+    Returns:
+        int: Hamming distance, or -1 if > d
+    """
+    result = 0
+    for (a, b) in zip(str1, str2):
+        if a != b:
+            result += 1
+            if result > d:
+                return -1
+
+    return result
+
+
+def approx_match(txt: str, pattern: str, distance: int) -> array.array:
     """Find all approximate occurrences of a pattern in a string
 
     Args:
@@ -64,9 +261,10 @@ def approx_match(txt: str, pattern: str, distance: int) -> list:
         distance (int): Hamming distance (d)
 
     Returns:
-        list: start positions of all instances of pattern in txt with < d mismatches
+        array.array: start positions (int64) of all instances of pattern in txt
+            with <= d mismatches
     """
-    result = []
+    result = array.array("q")
 
     len_txt = len(txt)
     len_pattern = len(pattern)
@@ -78,13 +276,215 @@ def approx_match(txt: str, pattern: str, distance: int) -> list:
     return result
 
 
+def approx_match_bit_parallel(
+    txt: str, pattern: str, distance: int, block_size: int = 1 << 22
+) -> array.array:
+    """Find all approximate occurrences of a pattern in a string - bit-parallel
+    Each alignment is one bit of a Python int. For each pattern position j the
+    text's mismatch bitset for pattern[j] is shifted down by j and added into a
+    bit-sliced counter (1 int per counter bit, carries beyond d saturate into an
+    overflow bitset), so the loop runs len(pattern) times over whole-text words.
+    The text is processed in blocks of alignments overlapping by len(pattern)-1.
+
+    Args:
+        txt (str): text to search
+        pattern (str): pattern to match
+        distance (int): Hamming distance (d)
+        block_size (int): # alignments per block
+
+    Returns:
+        array.array: start positions (int64) of all instances of pattern in txt
+            with <= d mismatches
+    """
+    result = array.array("q")
+    if distance < 0:
+        return result
+
+    len_pattern = len(pattern)
+    n_alignments = len(txt) - len_pattern + 1
+    n_planes = distance.bit_length()
+
+    for start in range(0, n_alignments, block_size):
+        n_block = min(block_size, n_alignments - start)
+        full = (1 << n_block) - 1
+        segment = txt[start : start + n_block + len_pattern - 1]
+
+        # bit i of mismatches[c] is set if segment[i] != c
+        mismatches = {}
+        reversed_segment = segment[::-1]
+        symbols = set(segment)
+        for c in set(pattern):
+            table = {ord(s): "1" for s in symbols}
+            table[ord(c)] = "0"
+            bits = reversed_segment.translate(table)
+            mismatches[c] = int(bits, 2) if bits else 0
+
+        planes = [0] * n_planes
+        overflow = 0
+        for (j, c) in enumerate(pattern):
+            carry = (mismatches[c] >> j) & full
+            for p in range(n_planes):
+                (planes[p], carry) = (planes[p] ^ carry, planes[p] & carry)
+            overflow |= carry
+
+        # bit-sliced compare: count <= distance
+        (less, equal) = (0, full)
+        for p in reversed(range(n_planes)):
+            if distance >> p & 1:
+                less |= equal & ~planes[p]
+                equal &= planes[p]
+            else:
+                equal &= ~planes[p]
+        matches = (less | equal) & ~overflow & full
+
+        bits = bin(matches)[:1:-1]
+        i = bits.find("1")
+        while i >= 0:
+            result.append(start + i)
+            i = bits.find("1", i + 1)
+
+    return result
+
+
+# 2-bit code for each byte: A=0, C=1, G=2, T=3 (either case)
+SYMBOL_TABLE = bytes.maketrans(b"ACGTacgt", bytes([0, 1, 2, 3, 0, 1, 2, 3]))
+
+
+def kmer_codes(txt: str, k: int) -> array.array:
+    """compute the 2-bit code of every k-mer of a DNA sequence
+        Assumes only ACGT in the string
+
+    Args:
+        txt (str): DNA sequence
+        k (int): k-mer length
+
+    Returns:
+        array.array: code (int64) of the k-mer starting at each position
+    """
+    mask = 4**k - 1
+    result = array.array("q")
+    code = 0
+    for (i, symbol) in enumerate(txt.encode().translate(SYMBOL_TABLE)):
+        code = ((code << 2) | symbol) & mask
+        if i >= k - 1:
+            result.append(code)
+    return result
+
+
+def build_kmer_index(txt: str, k: int) -> tuple:
+    """index the positions of every k-mer of txt
+
+    Args:
+        txt (str): text to index (ACGT)
+        k (int): k-mer length (<= 31)
+
+    Returns:
+        tuple: (k, codes, positions)
+            codes, positions - parallel int64 arrays sorted by (code, position)
+    """
+    all_codes = kmer_codes(txt, k)
+    order = sorted(range(len(all_codes)), key=all_codes.__getitem__)
+    codes = array.array("q", (all_codes[i] for i in order))
+    positions = array.array("q", order)
+    return (k, codes, positions)
+
+
+def approx_match_indexed(
+    index: tuple, txt: str, pattern: str, distance: int
+) -> array.array:
+    """Find all approximate occurrences of a pattern using a k-mer index
+
+    Split the pattern into d+1 blocks: by pigeonhole every occurrence with <= d
+    mismatches matches at least 1 block exactly, so the 1st k-mer of each block
+    is looked up in the index and only those candidates are verified against
+    txt. Patterns with blocks shorter than k fall back to
+    approx_match_bit_parallel.
+
+    Args:
+        index (tuple): (k, codes, positions) from build_kmer_index
+        txt (str): indexed text
+        pattern (str): pattern to match
+        distance (int): Hamming distance (d)
+
+    Returns:
+        array.array: start positions (int64) of all instances of pattern in txt
+            with <= d mismatches
+    """
+    (k, codes, positions) = index
+    len_pattern = len(pattern)
+    if distance < 0 or len_pattern > len(txt):
+        return array.array("q")
+    n_seeds = distance + 1
+    if len_pattern // n_seeds < k:
+        return approx_match_bit_parallel(txt, pattern, distance)
+
+    last = len(txt) - len_pattern
+    candidates = set()
+    for i in range(n_seeds):
+        offset = len_pattern * i // n_seeds
+        code = kmer_codes(pattern[offset : offset + k], k)[0]
+        lo = bisect.bisect_left(codes, code)
+        hi = bisect.bisect_right(codes, code)
+        for pos in positions[lo:hi]:
+            if offset <= pos <= last + offset:
+                candidates.add(pos - offset)
+
+    result = array.array("q")
+    for start in sorted(candidates):
+        if hamming_within(pattern, txt[start : start + len_pattern], distance) >= 0:
+            result.append(start)
+    return result
+
+
+def benchmark(txt: str, pattern: str, distance: int):
+    """time approx_match against approx_match_bit_parallel (printed to stderr)
+
+    Args:
+        txt (str): text to search
+        pattern (str): pattern to match
+        distance (int): Hamming distance (d)
+    """
+    timings = {}
+    results = {}
+    for method in (approx_match, approx_match_bit_parallel):
+        start = time.perf_counter()
+        results[method.__name__] = method(txt, pattern, distance)
+        timings[method.__name__] = time.perf_counter() - start
+
+    for (name, seconds) in timings.items():
+        print(f"{name}: {seconds:.3f} s", file=sys.stderr)
+    same = len(set(map(bytes, results.values()))) == 1
+    print(f"same positions: {same}", file=sys.stderr)
+
+
 def main():
     """main"""
     args = parse_arguments()
     (txt, pattern, distance) = parse_file(args.data_file)
 
-    result = approx_match(txt, pattern, distance)
-    print(f"{' '.join(str(e) for e in result)}")
+    if args.benchmark:
+        benchmark(txt, pattern, distance)
+        return
+
+    if args.kmer_index:
+        if not 1 <= args.kmer_index <= 31:
+            raise SystemExit("--kmer_index K must be 1..31 (int64 k-mer codes)")
+        index = build_kmer_index(txt, args.kmer_index)
+        if args.query_file:
+            if args.output_format != "text":
+                raise SystemExit("--query_file results are written as text (-f text)")
+            for (i, query) in enumerate(parse_pattern_file(args.query_file)):
+                result = approx_match_indexed(index, txt, query, distance)
+                write_positions(
+                    result, args.output_file, prefix=f"{query}: ", append=i > 0
+                )
+            return
+        result = approx_match_indexed(index, txt, pattern, distance)
+    elif args.bit_parallel:
+        result = approx_match_bit_parallel(txt, pattern, distance)
+    else:
+        result = approx_match(txt, pattern, distance)
+    write_positions(result, args.output_file, args.output_format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+# /usr/bin/env python3
+"""Bioinformatics Algorithms Ch 01 Problem 1J
+   Find the most frequent k-mers with mismatches <= d in a string (including reverse complements)
+   (k-mers are handled as 2-bit integer codes with NumPy - requires numpy)
+
+"""
+import argparse
+import itertools
+
+import numpy as np
+
+# 2-bit code for each byte: A=0, C=1, G=2, T=3 (either case)
+SYMBOL_CODES = np.zeros(256, dtype=np.uint8)
+for (symbols, code) in (("Aa", 0), ("Cc", 1), ("Gg", 2), ("Tt", 3)):
+    for symbol in symbols:
+        SYMBOL_CODES[ord(symbol)] = code
+
+# masks for reversing the order of the 2-bit groups in a 64-bit word
+REVERSE_MASKS = (
+    (2, np.uint64(0x3333333333333333)),
+    (4, np.uint64(0x0F0F0F0F0F0F0F0F)),
+    (8, np.uint64(0x00FF00FF00FF00FF)),
+    (16, np.uint64(0x0000FFFF0000FFFF)),
+)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """parse arguments
+
+    Returns:
+        argparse.Namespace: argument object
+    """
+    parser = argparse.ArgumentParser(
+        description="Find the most frequent k-mers with mismatches <= d in a string (including reverse complements)"
+    )
+    parser.add_argument("data_file", help="input - 1st line - string; 2nd line k d")
+    args = parser.parse_args()
+    return args
+
+
+def parse_file(filename: str) -> tuple:
+    """Parse file
+
+    Args:
+        filename (str): file - string, k, d
+
+    Returns:
+        tuple: (txt, k, d)
+    """
+    with open(filename) as f:
+        lines = f.readlines()
+        txt = lines[0].strip()
+        tokens = lines[1].strip().split()
+        (k, d) = (int(t) for t in tokens)
+    return (txt, k, d)
+
+
+def encode_sequence(txt: str) -> np.ndarray:
+    """convert a DNA sequence to 2-bit symbol codes
+        Assumes only ACGT in the string
+
+    Args:
+        txt (str): DNA sequence
+
+    Returns:
+        np.ndarray: uint8 array of codes (A=0, C=1, G=2, T=3)
+    """
+    return SYMBOL_CODES[np.frombuffer(txt.encode(), dtype=np.uint8)]
+
+
+def kmer_codes(codes: np.ndarray, k: int) -> np.ndarray:
+    """compute the integer code of every k-mer (same numbering as pattern_to_number)
+
+    Args:
+        codes (np.ndarray): 2-bit symbol codes
+        k (int): k-mer length (<= 32)
+
+    Returns:
+        np.ndarray: uint64 array - code of the k-mer starting at each position
+    """
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64)
+
+    # build up the code length bit by bit from the top of k:
+    # doubling joins two length-L codes L apart; a set bit appends one base
+    result = codes.astype(np.uint64)
+    length = 1
+    for bit in bin(k)[3:]:
+        result = (result[:-length] << np.uint64(2 * length)) | result[length:]
+        length *= 2
+        if bit == "1":
+            result = (result[:-1] << np.uint64(2)) | codes[length:]
+            length += 1
+    return result
+
+
+def number_to_pattern(index: int, k: int) -> str:
+    """Convert a k-mer code back to its pattern
+
+    Args:
+        index (int): k-mer code
+        k (int): k-mer length
+
+    Returns:
+        str: pattern
+    """
+    symbols = []
+    for _ in range(k):
+        symbols.append("ACGT"[index & 3])
+        index >>= 2
+    return "".join(reversed(symbols))
+
+
+def reverse_complement_codes(codes: np.ndarray, k: int) -> np.ndarray:
+    """compute the reverse complement of a batch of 2-bit k-mer codes
+
+    With A=0, C=1, G=2, T=3 the complement of a base is code ^ 3, so a k-mer is
+    complemented with one XOR; the 2-bit groups are then reversed in place
+    with swap-and-mask steps, and the k-mer is shifted back down.
+
+    Args:
+        codes (np.ndarray): k-mer codes
+        k (int): k-mer length (<= 32)
+
+    Returns:
+        np.ndarray: uint64 array - code of the reverse complement of each k-mer
+    """
+    result = codes.astype(np.uint64) ^ np.uint64(4**k - 1)
+    for (shift, mask) in REVERSE_MASKS:
+        shift = np.uint64(shift)
+        result = ((result >> shift) & mask) | ((result & mask) << shift)
+    result = (result >> np.uint64(32)) | (result << np.uint64(32))
+    return result >> np.uint64(64 - 2 * k)
+
+
+def mismatch_masks(k: int, d: int) -> np.ndarray:
+    """compute every XOR mask changing at most d bases of a k-mer code
+
+    Args:
+        k (int): k-mer length
+        d (int): maximum # changed bases
+
+    Returns:
+        np.ndarray: uint64 array of masks (including 0 - no change)
+    """
+    masks = [0]
+    for n_changes in range(1, d + 1):
+        for positions in itertools.combinations(range(k), n_changes):
+            for changes in itertools.product((1, 2, 3), repeat=n_changes):
+                masks.append(
+                    sum(c << (2 * p) for (p, c) in zip(positions, changes))
+                )
+    return np.array(masks, dtype=np.uint64)
+
+
+def find_most_frequent_words_mismatches_with_rc_faster(
+    txt: str, k: int, d: int, batch_size: int = 1 << 22
+) -> set:
+    """Find the most frequent k-mers in text with <= d mismatches
+    Includes reverse complement.
+    Method will return both the match and the reverse complement for each match.
+    Assumes only ACGT in the string; holds a count for all 4^k k-mers
+
+    Args:
+        txt (str): text to search
+        k (int): k-mer length
+        d (int): maximum allowed Hamming distance
+        batch_size (int): max # neighbor codes generated at once
+
+    Returns:
+        set: most frequent strings (w/ mismatches) including reverse complement
+            (empty if txt is shorter than k)
+    """
+    codes = kmer_codes(encode_sequence(txt), k)
+    if len(codes) == 0:
+        return set()
+    masks = mismatch_masks(k, d)
+
+    # every k-mer's d-neighborhood is its code XOR each mask
+    counts = np.zeros(4**k, dtype=np.int64)
+    step = max(1, batch_size // len(masks))
+    for i in range(0, len(codes), step):
+        neighborhood = (codes[i : i + step, np.newaxis] ^ masks).ravel()
+        counts += np.bincount(neighborhood.astype(np.intp), minlength=4**k)
+
+    # add the # hits to both each k-mer and its reverse complement
+    rc_codes = reverse_complement_codes(np.arange(4**k, dtype=np.uint64), k)
+    counts_with_rc = counts + counts[rc_codes.astype(np.intp)]
+
+    max_count = counts_with_rc.max()
+    result = {
+        number_to_pattern(int(code), k)
+        for code in np.flatnonzero(counts_with_rc == max_count)
+    }
+    return result
+
+
+def main():
+    """main"""
+    args = parse_arguments()
+    (txt, k, d) = parse_file(args.data_file)
+
+    result = find_most_frequent_words_mismatches_with_rc_faster(txt, k, d)
+    print(" ".join(result))
+
+
+if __name__ == "__main__":
+    main()